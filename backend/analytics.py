@@ -0,0 +1,137 @@
+import json
+import math
+import threading
+from statistics import median
+
+from sqlalchemy import select
+from database import Participant, Answer
+from answer_buffer import ANSWER_BUFFER, answer_buffer
+from shared_state import shared_state
+
+OPTIONS = "ABCD"
+
+def channel_answers(channel_id):
+    return select(Answer.participant_id, Answer.question_id, Answer.selected_answer, Answer.is_correct) \
+        .join(Participant, Participant.id == Answer.participant_id) \
+        .where(Participant.channel_id == channel_id)
+
+def channel_scores(channel_id):
+    return select(Participant.score, Participant.quiz_submitted).where(Participant.channel_id == channel_id)
+
+def point_biserial(responses, correct, total_sum, total_squares, correct_total_sum):
+    """Correlation between answering an item correctly and the participant's total."""
+    wrong = responses - correct
+    if not correct or not wrong:
+        return None
+    variance = total_squares / responses - (total_sum / responses) ** 2
+    if variance <= 0:
+        return None
+    mean_correct = correct_total_sum / correct
+    mean_wrong = (total_sum - correct_total_sum) / wrong
+    return (mean_correct - mean_wrong) / math.sqrt(variance) * math.sqrt(correct * wrong) / responses
+
+def compute_analytics(answers, scores):
+    """Item statistics from (participant_id, question_id, selected_answer, is_correct) rows
+    and the score histogram from (score, submitted) rows, in two passes over the answers."""
+    totals = {}
+    for participant_id, _, _, is_correct in answers:
+        totals[participant_id] = totals.get(participant_id, 0) + bool(is_correct)
+
+    # question_id -> [responses, correct, total_sum, total_squares, correct_total_sum, option counts]
+    items = {}
+    for participant_id, question_id, selected_answer, is_correct in answers:
+        item = items.get(question_id)
+        if item is None:
+            item = items[question_id] = [0, 0, 0, 0, 0, dict.fromkeys(OPTIONS, 0)]
+        total = totals[participant_id]
+        item[0] += 1
+        item[2] += total
+        item[3] += total * total
+        if is_correct:
+            item[1] += 1
+            item[4] += total
+        if selected_answer in item[5]:
+            item[5][selected_answer] += 1
+
+    questions = []
+    for question_id in sorted(items):
+        responses, correct, total_sum, total_squares, correct_total_sum, options = items[question_id]
+        discrimination = point_biserial(responses, correct, total_sum, total_squares, correct_total_sum)
+        questions.append({
+            "question_id": question_id,
+            "responses": responses,
+            "p_value": round(correct / responses, 4),
+            "discrimination": None if discrimination is None else round(discrimination, 4),
+            "options": options
+        })
+
+    values = [score or 0 for score, _ in scores]
+    histogram = [0] * (max(values, default=0) + 1)
+    for value in values:
+        histogram[value] += 1
+
+    return {
+        "participants": len(values),
+        "submitted": sum(1 for _, submitted in scores if submitted),
+        "answers": len(answers),
+        "mean_score": round(sum(values) / len(values), 2) if values else None,
+        "median_score": median(values) if values else None,
+        # score_histogram[n] is the number of participants with score n
+        "score_histogram": histogram,
+        "questions": questions
+    }
+
+class ChannelAnalytics:
+    """Per-channel statistics as JSON bytes, kept until the channel's answers change.
+
+    Every answer, submit and regrade path updates or drops the channel's
+    leaderboard, so its broadcasts double as the invalidation signal here.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._results = {}
+        self._generations = {}
+        self._epoch = 0
+
+    def _stamp(self, channel_id):
+        return self._epoch, self._generations.get(channel_id, 0)
+
+    def get(self, db, channel_id):
+        with self._lock:
+            cached = self._results.get(channel_id)
+            stamp = self._stamp(channel_id)
+        if cached is not None:
+            return cached
+        # Buffered answers are already on the leaderboard; include them too
+        if ANSWER_BUFFER:
+            answer_buffer.flush()
+        answers = db.execute(channel_answers(channel_id)).all()
+        scores = db.execute(channel_scores(channel_id)).all()
+        result = json.dumps(compute_analytics(answers, scores)).encode()
+        with self._lock:
+            # Answers that landed while computing leave the result uncached
+            if self._stamp(channel_id) == stamp:
+                self._results[channel_id] = result
+        return result
+
+    def _invalidate(self, data):
+        with self._lock:
+            channel_id = data["channel_id"]
+            self._results.pop(channel_id, None)
+            self._generations[channel_id] = self._generations.get(channel_id, 0) + 1
+
+    def _drop(self, data=None):
+        channel_id = data["channel_id"] if data else None
+        if channel_id is not None:
+            self._invalidate(data)
+            return
+        with self._lock:
+            self._results.clear()
+            self._generations.clear()
+            self._epoch += 1
+
+channel_analytics = ChannelAnalytics()
+shared_state.on("leaderboard.update", channel_analytics._invalidate)
+shared_state.on("leaderboard.drop", channel_analytics._drop)
+shared_state.on_resync(channel_analytics._drop)
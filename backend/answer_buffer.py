@@ -0,0 +1,229 @@
+"""Write-behind buffer for answer submissions (ANSWER_BUFFER=true).
+
+Submissions are graded and scored against the stored answers plus anything
+still buffered, appended to a local log and acknowledged. A background
+thread writes the buffer to the answers table every ANSWER_BUFFER_FLUSH_MS
+or once ANSWER_BUFFER_MAX_ROWS rows are waiting, in one transaction, so
+many clicks share one commit.
+
+Each flush starts a new log segment and deletes the old one once the
+transaction commits. Segments left behind by a crash are replayed at
+startup; replay is an upsert of the latest answer per question, so
+replaying rows that already reached the database is harmless.
+"""
+import glob
+import json
+import logging
+import os
+import threading
+
+from sqlalchemy import select
+
+from database import SessionLocal, Participant, Answer
+from scoring import apply_answers
+
+ANSWER_BUFFER = os.getenv("ANSWER_BUFFER", "false").lower() == "true"
+ANSWER_BUFFER_FLUSH_MS = int(os.getenv("ANSWER_BUFFER_FLUSH_MS", "50"))
+ANSWER_BUFFER_MAX_ROWS = int(os.getenv("ANSWER_BUFFER_MAX_ROWS", "500"))
+ANSWER_BUFFER_LOG = os.getenv("ANSWER_BUFFER_LOG", "answers.log")
+# Writes to the log survive a process crash; fsync also covers power loss, at one fsync per submission
+ANSWER_BUFFER_FSYNC = os.getenv("ANSWER_BUFFER_FSYNC", "false").lower() == "true"
+
+logger = logging.getLogger("quiz.answers")
+
+def answer_state(participant_id):
+    """Stored score and answers of a participant in one statement, so both come from one snapshot."""
+    return select(Participant.score, Answer.question_id, Answer.is_correct) \
+        .outerjoin(Answer, Answer.participant_id == Participant.id) \
+        .where(Participant.id == participant_id)
+
+def merge_into(target, batch):
+    """Merge {participant_id: {question_id: answer}} into target; later answers win."""
+    for participant_id, graded in batch.items():
+        target.setdefault(participant_id, {}).update(graded)
+
+def write_batch(db, batch):
+    """Apply buffered answers in one transaction, skipping participants deleted meanwhile."""
+    existing = set(db.execute(select(Participant.id).where(Participant.id.in_(list(batch)))).scalars())
+    for participant_id, graded in batch.items():
+        if participant_id in existing:
+            apply_answers(db, participant_id, graded)
+    db.commit()
+
+class AnswerBuffer:
+    def __init__(self, log_path=ANSWER_BUFFER_LOG, flush_ms=ANSWER_BUFFER_FLUSH_MS,
+                 max_rows=ANSWER_BUFFER_MAX_ROWS, fsync=ANSWER_BUFFER_FSYNC):
+        self.log_path = log_path
+        self.flush_interval = flush_ms / 1000
+        self.max_rows = max_rows
+        self.fsync = fsync
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self._log = None
+        self._segment = 0
+        self._segments = []
+        # {participant_id: {question_id: (selected_answer, is_correct)}}
+        self.pending = {}
+        self.inflight = {}
+        self.rows = 0
+        # Bumped after each commit; readers that saw an older generation re-read
+        self.generation = 0
+        self.flushed_rows = 0
+
+    def add(self, participant_id, graded, state_rows, generation):
+        """Buffer graded answers and return the participant's new score.
+
+        state_rows come from answer_state(); returns None if a flush committed
+        after they were read, in which case the caller reads them again.
+        """
+        with self._lock:
+            if generation != self.generation:
+                return None
+            stored_score = state_rows[0][0] if state_rows else 0
+            stored = {question_id: is_correct for _, question_id, is_correct in state_rows if question_id is not None}
+            unsaved = {**self.inflight.get(participant_id, {}), **self.pending.get(participant_id, {}), **graded}
+            score = (stored_score or 0) + sum(
+                int(is_correct) - int(bool(stored.get(question_id)))
+                for question_id, (_, is_correct) in unsaved.items()
+            )
+            self._append_log(participant_id, graded)
+            pending = self.pending.setdefault(participant_id, {})
+            before = len(pending)
+            pending.update(graded)
+            self.rows += len(pending) - before
+            full = self.rows >= self.max_rows
+        if full:
+            self._wake.set()
+        return score
+
+    def has_pending(self, participant_id):
+        with self._lock:
+            return participant_id in self.pending or participant_id in self.inflight
+
+    def flush(self, participant_id=None):
+        """Write buffered answers to the database; with participant_id, only if they have any."""
+        if participant_id is not None and not self.has_pending(participant_id):
+            return
+        with self._flush_lock:
+            with self._lock:
+                if not self.pending:
+                    return
+                batch, self.pending, self.rows = self.pending, {}, 0
+                self.inflight = batch
+                self._rotate_log()
+                segments, self._segments = self._segments, []
+            db = SessionLocal()
+            try:
+                write_batch(db, batch)
+            except Exception:
+                db.rollback()
+                with self._lock:
+                    # Put the batch back under anything buffered since
+                    merge_into(batch, self.pending)
+                    self.pending, self.inflight = batch, {}
+                    self.rows = sum(len(graded) for graded in batch.values())
+                    self._segments = segments + self._segments
+                raise
+            finally:
+                db.close()
+            with self._lock:
+                self.inflight = {}
+                self.generation += 1
+                self.flushed_rows += sum(len(graded) for graded in batch.values())
+            for path in segments:
+                os.remove(path)
+
+    def _append_log(self, participant_id, graded):
+        record = {"p": participant_id, "a": [[qid, sel, correct] for qid, (sel, correct) in graded.items()]}
+        self._log.write(json.dumps(record, separators=(",", ":")) + "\n")
+        self._log.flush()
+        if self.fsync:
+            os.fsync(self._log.fileno())
+
+    def _rotate_log(self):
+        self._log.close()
+        self._segment += 1
+        segment = f"{self.log_path}.{self._segment}"
+        os.replace(self.log_path, segment)
+        self._segments.append(segment)
+        self._log = open(self.log_path, "a", encoding="utf-8")
+
+    def _log_files(self):
+        segments = [p for p in glob.glob(glob.escape(self.log_path) + ".*") if p.rsplit(".", 1)[-1].isdigit()]
+        segments.sort(key=lambda p: int(p.rsplit(".", 1)[-1]))
+        if os.path.exists(self.log_path):
+            segments.append(self.log_path)
+        return segments
+
+    def recover(self):
+        """Replay log segments left by a previous process; returns the number of answers replayed."""
+        paths = self._log_files()
+        batch = {}
+        for path in paths:
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        # A torn final line from a crash mid-write
+                        continue
+                    merge_into(batch, {record["p"]: {qid: (sel, correct) for qid, sel, correct in record["a"]}})
+        if batch:
+            db = SessionLocal()
+            try:
+                write_batch(db, batch)
+            finally:
+                db.close()
+        for path in paths:
+            os.remove(path)
+        return sum(len(graded) for graded in batch.values())
+
+    def start(self):
+        replayed = self.recover()
+        if replayed:
+            logger.warning("Replayed %d buffered answers from %s", replayed, self.log_path)
+        self._log = open(self.log_path, "a", encoding="utf-8")
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="answer-buffer", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._wake.set()
+        self._thread.join()
+        self._thread = None
+        try:
+            self.flush()
+        except Exception:
+            logger.exception("Final answer buffer flush failed; answers will be replayed from %s", self.log_path)
+            return
+        finally:
+            with self._lock:
+                self._log.close()
+        # Everything reached the database
+        os.remove(self.log_path)
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("Answer buffer flush failed; retrying")
+
+def record_answers(db, participant_id, graded):
+    """Buffer graded answers for a participant and return their new score."""
+    while True:
+        generation = answer_buffer.generation
+        rows = db.execute(answer_state(participant_id)).all()
+        score = answer_buffer.add(participant_id, graded, rows, generation)
+        if score is not None:
+            return score
+
+answer_buffer = AnswerBuffer()
@@ -0,0 +1,192 @@
+from fastapi import APIRouter, Depends, HTTPException
+from starlette.concurrency import run_in_threadpool
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from database import get_async_db, SessionLocal, answer_upsert, User, Channel, Participant
+from leaderboard import leaderboards
+from live import live_hub
+from question_bank import question_bank, draw_ids_from, pack_question_ids
+from grading import answer_keys, grade_with
+from schemas import JoinChannel, SubmitAnswer
+from scoring import lock_participant, previous_answers, grade_rows, add_to_score, current_score, mark_submitted
+from answer_buffer import ANSWER_BUFFER, answer_buffer, answer_state
+from identity_cache import identity_cache, participant_lookup, lookup_failure
+from quiz_timer import deadline_for, seconds_remaining, check_deadline
+from datetime import datetime
+from typing import List
+
+# Async versions of the participant write path, mounted ahead of the sync
+# routes in main.py when DB_ASYNC=true
+router = APIRouter()
+
+async def apply_answers(db: AsyncSession, participant_id: int, graded):
+    await db.execute(lock_participant(participant_id))
+    previous = dict((await db.execute(previous_answers(participant_id, list(graded)))).all())
+    rows, delta = grade_rows(participant_id, graded, previous)
+    await db.execute(answer_upsert(rows))
+    if delta:
+        await db.execute(add_to_score(participant_id, delta))
+    return await db.scalar(current_score(participant_id))
+
+async def record_answers(db: AsyncSession, participant_id: int, graded):
+    while True:
+        generation = answer_buffer.generation
+        rows = (await db.execute(answer_state(participant_id))).all()
+        score = answer_buffer.add(participant_id, graded, rows, generation)
+        if score is not None:
+            return score
+
+def with_sync_session(load):
+    db = SessionLocal()
+    try:
+        return load(db)
+    finally:
+        db.close()
+
+async def grade(selected):
+    # Like draw_ids: only a cache miss goes to the threadpool
+    key = answer_keys.cached() or await run_in_threadpool(with_sync_session, answer_keys.get)
+    return grade_with(key, selected)
+
+async def draw_ids(seed):
+    records = question_bank.cached_records()
+    if records is None:
+        # A cache miss reloads the bank under a thread lock, so it runs in the
+        # threadpool on a sync session rather than awaiting I/O on this loop
+        records = await run_in_threadpool(with_sync_session, question_bank.records)
+    return draw_ids_from(records, seed)
+
+async def resolve_participant(db: AsyncSession, username: str, channel_code: str):
+    cached = identity_cache.get(username, channel_code)
+    if cached is not None:
+        return cached
+
+    row = (await db.execute(participant_lookup(username, channel_code))).first()
+    if row is None:
+        user_id = await db.scalar(select(User.id).where(User.username == username))
+        channel_id = await db.scalar(select(Channel.id).where(Channel.code == channel_code))
+        raise HTTPException(status_code=404, detail=lookup_failure(user_id, channel_id))
+
+    identity_cache.put(username, channel_code, row.id, row.channel_id, row.deadline_at)
+    return row.id, row.channel_id, row.deadline_at
+
+@router.post("/join-channel/")
+async def join_channel_async(join_data: JoinChannel, db: AsyncSession = Depends(get_async_db)):
+    channel = await db.scalar(select(Channel).where(Channel.code == join_data.code))
+    if not channel:
+        raise HTTPException(status_code=404, detail="Channel not found")
+
+    user = await db.scalar(select(User).where(User.username == join_data.username))
+    if not user:
+        user = User(username=join_data.username, is_admin=False)
+        db.add(user)
+        await db.commit()
+        await db.refresh(user)
+    # A rollback expires these, and reloading them lazily isn't possible on an AsyncSession
+    user_id, username = user.id, user.username
+    channel_id, channel_code, channel_name = channel.id, channel.code, channel.name
+
+    existing = await db.scalar(select(Participant).where(
+        Participant.user_id == user_id,
+        Participant.channel_id == channel_id
+    ))
+
+    if existing:
+        if existing.quiz_submitted:
+            raise HTTPException(status_code=400, detail="You have already completed this quiz")
+        else:
+            # Re-joining keeps the original start time and deadline
+            if existing.deadline_at is None:
+                existing.deadline_at = deadline_for(existing.quiz_started_at or datetime.utcnow(), channel.duration_minutes)
+            if existing.question_ids is None:
+                existing.question_ids = pack_question_ids(await draw_ids(f"{channel_id}:{existing.id}"))
+            await db.commit()
+            participant = existing
+    else:
+        started_at = datetime.utcnow()
+        participant = Participant(user_id=user_id, channel_id=channel_id, quiz_started_at=started_at,
+                                  deadline_at=deadline_for(started_at, channel.duration_minutes))
+        db.add(participant)
+        try:
+            await db.flush()
+            participant.question_ids = pack_question_ids(await draw_ids(f"{channel_id}:{participant.id}"))
+            await db.commit()
+        except IntegrityError:
+            # A concurrent join created the participant first
+            await db.rollback()
+            participant = await db.scalar(select(Participant).where(
+                Participant.user_id == user_id,
+                Participant.channel_id == channel_id
+            ))
+        else:
+            await db.refresh(participant)
+    identity_cache.put(username, channel_code, participant.id, channel_id, participant.deadline_at)
+    leaderboards.update(channel_id, participant.id, username, participant.score or 0)
+    live_hub.joined(channel_code, username)
+
+    return {
+        "message": "Joined successfully",
+        "channel": channel_name,
+        "quiz_started_at": participant.quiz_started_at.isoformat(),
+        "deadline_at": participant.deadline_at.isoformat(),
+        "seconds_remaining": seconds_remaining(participant.deadline_at)
+    }
+
+@router.post("/submit-answer/")
+async def submit_answer_async(answer_data: SubmitAnswer, username: str, channel_code: str, db: AsyncSession = Depends(get_async_db)):
+    participant_id, channel_id, deadline_at = await resolve_participant(db, username, channel_code)
+    check_deadline(deadline_at)
+
+    graded, missing = await grade({answer_data.question_id: answer_data.selected_answer})
+    if missing:
+        raise HTTPException(status_code=404, detail="Question not found")
+    is_correct = graded[answer_data.question_id][1]
+
+    if ANSWER_BUFFER:
+        score = await record_answers(db, participant_id, graded)
+    else:
+        score = await apply_answers(db, participant_id, graded)
+        await db.commit()
+    leaderboards.update(channel_id, participant_id, username, score)
+    live_hub.score(channel_code, username, score)
+    return {"correct": is_correct, "score": score}
+
+@router.post("/submit-answers/")
+async def submit_answers_async(answers: List[SubmitAnswer], username: str, channel_code: str, db: AsyncSession = Depends(get_async_db)):
+    participant_id, channel_id, deadline_at = await resolve_participant(db, username, channel_code)
+    check_deadline(deadline_at)
+
+    selected = {a.question_id: a.selected_answer for a in answers}
+    if not selected:
+        return {"results": [], "score": await db.scalar(current_score(participant_id))}
+
+    graded, missing = await grade(selected)
+    if missing:
+        raise HTTPException(status_code=404, detail=f"Questions not found: {missing}")
+
+    if ANSWER_BUFFER:
+        score = await record_answers(db, participant_id, graded)
+    else:
+        score = await apply_answers(db, participant_id, graded)
+        await db.commit()
+    leaderboards.update(channel_id, participant_id, username, score)
+    live_hub.score(channel_code, username, score)
+    return {
+        "results": [{"question_id": question_id, "correct": correct} for question_id, (_, correct) in graded.items()],
+        "score": score
+    }
+
+@router.post("/submit-quiz/")
+async def submit_quiz_async(username: str, channel_code: str, db: AsyncSession = Depends(get_async_db)):
+    participant_id, channel_id, _ = await resolve_participant(db, username, channel_code)
+    if ANSWER_BUFFER:
+        await run_in_threadpool(answer_buffer.flush, participant_id)
+
+    await db.execute(mark_submitted(participant_id))
+    score = await db.scalar(current_score(participant_id))
+    await db.commit()
+    leaderboards.update(channel_id, participant_id, username, score, True)
+    live_hub.submitted(channel_code, username, score)
+
+    return {"message": "Quiz submitted successfully", "final_score": score}
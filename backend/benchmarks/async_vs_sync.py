@@ -0,0 +1,75 @@
+"""Compare the sync and async (DB_ASYNC=true) request paths.
+
+Starts a uvicorn server per mode against a fresh SQLite database, then has
+N simulated participants concurrently join a channel, submit answers one by
+one and submit the quiz.
+
+    python benchmarks/async_vs_sync.py --users 200 --answers 20
+"""
+import argparse
+import asyncio
+import statistics
+import tempfile
+import time
+
+import httpx
+
+from server import start_server, wait_ready
+
+async def participant(client, code, username, answers, latencies):
+    async def timed(method, url, **kwargs):
+        start = time.perf_counter()
+        response = await client.request(method, url, **kwargs)
+        latencies.append(time.perf_counter() - start)
+        response.raise_for_status()
+        return response
+
+    await timed("POST", "/join-channel/", json={"code": code, "username": username})
+    questions = (await timed("GET", f"/questions/random/{answers}")).json()
+    for question in questions:
+        await timed("POST", f"/submit-answer/?username={username}&channel_code={code}",
+                    json={"question_id": question["id"], "selected_answer": "A"})
+    await timed("POST", f"/submit-quiz/?username={username}&channel_code={code}")
+
+async def run_mode(async_mode, args):
+    with tempfile.TemporaryDirectory() as workdir:
+        server = start_server(workdir, args.port, DB_ASYNC="true" if async_mode else "false")
+        try:
+            limits = httpx.Limits(max_connections=args.users)
+            async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{args.port}", limits=limits, timeout=60) as client:
+                await wait_ready(client)
+                await client.post("/admin/login", json={"username": "admin", "password": "admin123"})
+                code = (await client.post("/channels/?admin_username=admin", json={"name": "bench"})).json()["code"]
+
+                latencies = []
+                start = time.perf_counter()
+                await asyncio.gather(*[
+                    participant(client, code, f"user{i}", args.answers, latencies) for i in range(args.users)
+                ])
+                elapsed = time.perf_counter() - start
+        finally:
+            server.terminate()
+            server.wait()
+
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "throughput": len(latencies) / elapsed,
+        "p50": statistics.median(latencies) * 1000,
+        "p95": latencies[int(len(latencies) * 0.95) - 1] * 1000,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--answers", type=int, default=20)
+    parser.add_argument("--port", type=int, default=8099)
+    args = parser.parse_args()
+
+    for async_mode in (False, True):
+        result = asyncio.run(run_mode(async_mode, args))
+        print(f"{'async' if async_mode else 'sync':>5}: {result['requests']} requests, "
+              f"{result['throughput']:.0f} req/s, p50 {result['p50']:.1f} ms, p95 {result['p95']:.1f} ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""Per-route benchmarks against seeded databases of 1k, 10k and 100k answers.
+
+    cd backend
+    pip install -r requirements-dev.txt
+    pytest benchmarks                      # results saved under .benchmarks/
+    pytest benchmarks --benchmark-compare  # compare with the previous run
+"""
+import itertools
+
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+from database import SessionLocal, Channel, User, Participant
+from generate_data import generate_results
+
+def first_participant(channel_id):
+    db = SessionLocal()
+    try:
+        return db.query(User.username, Channel.code) \
+            .join(Participant, Participant.user_id == User.id) \
+            .join(Channel, Channel.id == Participant.channel_id) \
+            .filter(Channel.id == channel_id).first()
+    finally:
+        db.close()
+
+def test_get_all_results(benchmark, client, seeded_db):
+    response = benchmark(client.get, "/admin/results")
+    assert response.status_code == 200
+
+def test_get_channel_results(benchmark, client, seeded_db):
+    channel_id = seeded_db["channel_ids"][0]
+    response = benchmark(client.get, f"/admin/results?channel_id={channel_id}")
+    assert response.status_code == 200
+
+def test_get_user_detailed_results(benchmark, client, seeded_db):
+    username, _ = first_participant(seeded_db["channel_ids"][0])
+    response = benchmark(client.get, f"/admin/results/{username}")
+    assert response.status_code == 200
+
+def test_submit_answer(benchmark, client, seeded_db):
+    username, code = first_participant(seeded_db["channel_ids"][0])
+    # Alternate answers so both the correct and incorrect delta paths run
+    choices = itertools.cycle("ABCD")
+    url = f"/submit-answer/?username={username}&channel_code={code}"
+
+    def submit():
+        return client.post(url, json={"question_id": 1, "selected_answer": next(choices)})
+
+    response = benchmark(submit)
+    assert response.status_code == 200
+
+def test_random_question_draw(benchmark, client, seeded_db):
+    response = benchmark(client.get, "/questions/random/70")
+    assert response.status_code == 200
+
+def test_delete_channel(benchmark, client, seeded_db):
+    def setup():
+        db = SessionLocal()
+        try:
+            # A fresh channel the size of one seeded channel
+            channel_id, = generate_results(db, seeded_db["size"] // 5, prefix="delete")
+        finally:
+            db.close()
+        return (f"/admin/channels/{channel_id}",), {}
+
+    response = benchmark.pedantic(client.delete, setup=setup, rounds=5)
+    assert response.status_code == 200
@@ -0,0 +1,58 @@
+import os
+import sys
+import tempfile
+
+import pytest
+
+BENCH_DIR = tempfile.mkdtemp(prefix="quiz-bench-")
+os.environ["DATABASE_URL"] = f"sqlite:///{BENCH_DIR}/default.db"
+os.environ.setdefault("SCORE_CHECK_INTERVAL", "0")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, event
+
+import database
+from database import Base, SessionLocal, set_sqlite_pragmas
+from generate_data import generate_results
+from identity_cache import identity_cache
+from leaderboard import leaderboards
+from question_bank import question_bank
+from seed_questions import seed_aws_questions
+
+# Answer-table sizes to benchmark against; override with e.g. BENCH_SIZES=1000,10000
+SIZES = [int(size) for size in os.getenv("BENCH_SIZES", "1000,10000,100000").split(",")]
+
+def reset_caches():
+    question_bank.invalidate()
+    leaderboards.drop()
+    identity_cache.clear()
+
+@pytest.fixture(scope="session", params=SIZES, ids=lambda size: f"{size}-answers")
+def seeded_db(request):
+    """Bind the app to a database pre-filled with `size` answers."""
+    engine = create_engine(
+        f"sqlite:///{BENCH_DIR}/answers-{request.param}.db",
+        connect_args={"check_same_thread": False}
+    )
+    event.listen(engine, "connect", set_sqlite_pragmas)
+    Base.metadata.create_all(bind=engine)
+    SessionLocal.configure(bind=engine)
+    reset_caches()
+
+    seed_aws_questions()
+    db = SessionLocal()
+    try:
+        channel_ids = generate_results(db, request.param, channels=5)
+    finally:
+        db.close()
+    yield {"size": request.param, "channel_ids": channel_ids}
+
+    SessionLocal.configure(bind=database.engine)
+    reset_caches()
+    engine.dispose()
+
+@pytest.fixture(scope="session")
+def client():
+    from fastapi.testclient import TestClient
+    from main import app
+    return TestClient(app)
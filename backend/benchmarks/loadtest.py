@@ -0,0 +1,186 @@
+"""Classroom-session load test for the quiz backend.
+
+Replays the flow of frontend/src/app/page.tsx: each simulated student joins
+the channel, loads their questions, answers them with think time between
+clicks and submits the quiz, while admins poll /admin/results. Reports
+per-endpoint latency percentiles, throughput and error rates.
+
+    # against a running server
+    python benchmarks/loadtest.py --base-url http://localhost:8000 --channel-code ABC123 --users 200
+
+    # against a throwaway server on a fresh SQLite database
+    python benchmarks/loadtest.py --spawn --users 200 --think-time 0.2 1.0
+
+    # the same with four workers sharing state through a local Redis
+    SHARED_STATE_URL=redis://localhost:6379/0 python benchmarks/loadtest.py --spawn --workers 4 --users 200
+"""
+import argparse
+import asyncio
+import json
+import random
+import tempfile
+import time
+from collections import defaultdict
+
+import httpx
+
+from server import start_server, wait_ready
+
+class Stats:
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+
+    async def request(self, client, name, method, url, **kwargs):
+        start = time.perf_counter()
+        try:
+            response = await client.request(method, url, **kwargs)
+        except httpx.HTTPError:
+            self.latencies[name].append(time.perf_counter() - start)
+            self.errors[name] += 1
+            return None
+        self.latencies[name].append(time.perf_counter() - start)
+        if response.status_code >= 400:
+            self.errors[name] += 1
+            return None
+        return response
+
+    def report(self, elapsed):
+        rows = []
+        for name in sorted(self.latencies):
+            samples = sorted(self.latencies[name])
+            count = len(samples)
+            rows.append({
+                "endpoint": name,
+                "requests": count,
+                "errors": self.errors[name],
+                "error_rate": self.errors[name] / count,
+                "throughput": count / elapsed,
+                "p50_ms": percentile(samples, 50) * 1000,
+                "p95_ms": percentile(samples, 95) * 1000,
+                "p99_ms": percentile(samples, 99) * 1000,
+            })
+        return rows
+
+def percentile(samples, pct):
+    if not samples:
+        return 0.0
+    index = max(0, min(len(samples) - 1, int(round(pct / 100 * len(samples))) - 1))
+    return samples[index]
+
+async def student(client, stats, args, code, username):
+    await asyncio.sleep(random.uniform(0, args.ramp))
+    joined = await stats.request(client, "POST /join-channel/", "POST", "/join-channel/",
+                                 json={"code": code, "username": username})
+    if joined is None:
+        return
+
+    if args.question_source == "random":
+        response = await stats.request(client, "GET /questions/random/{count}", "GET", f"/questions/random/{args.questions}")
+    else:
+        response = await stats.request(client, "GET /quiz-questions/", "GET",
+                                       f"/quiz-questions/?username={username}&channel_code={code}")
+    if response is None:
+        return
+    questions = response.json()[:args.questions]
+
+    answers = []
+    for question in questions:
+        await asyncio.sleep(random.uniform(*args.think_time))
+        answer = {"question_id": question["id"], "selected_answer": random.choice("ABCD")}
+        if args.submit == "per-answer":
+            await stats.request(client, "POST /submit-answer/", "POST",
+                                f"/submit-answer/?username={username}&channel_code={code}", json=answer)
+        else:
+            answers.append(answer)
+    if answers:
+        await stats.request(client, "POST /submit-answers/", "POST",
+                            f"/submit-answers/?username={username}&channel_code={code}", json=answers)
+
+    await stats.request(client, "POST /submit-quiz/", "POST",
+                        f"/submit-quiz/?username={username}&channel_code={code}")
+
+async def admin(client, stats, args, done):
+    while not done.is_set():
+        await stats.request(client, "GET /admin/results", "GET", "/admin/results")
+        try:
+            await asyncio.wait_for(done.wait(), timeout=args.admin_interval)
+        except asyncio.TimeoutError:
+            pass
+
+async def create_channel(client):
+    await client.post("/admin/login", json={"username": "admin", "password": "admin123"})
+    response = await client.post("/channels/?admin_username=admin", json={"name": f"loadtest-{int(time.time())}"})
+    response.raise_for_status()
+    return response.json()["code"]
+
+async def run(args, base_url):
+    stats = Stats()
+    limits = httpx.Limits(max_connections=args.users + args.admins)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=args.timeout) as client:
+        if args.spawn:
+            await wait_ready(client)
+        code = args.channel_code or await create_channel(client)
+
+        done = asyncio.Event()
+        admins = [asyncio.create_task(admin(client, stats, args, done)) for _ in range(args.admins)]
+        start = time.perf_counter()
+        await asyncio.gather(*[
+            student(client, stats, args, code, f"{args.user_prefix}{i}") for i in range(args.users)
+        ])
+        elapsed = time.perf_counter() - start
+        done.set()
+        await asyncio.gather(*admins)
+    return elapsed, stats.report(elapsed)
+
+def print_report(elapsed, rows):
+    total = sum(r["requests"] for r in rows)
+    errors = sum(r["errors"] for r in rows)
+    print(f"{total} requests in {elapsed:.1f}s ({total / elapsed:.1f} req/s), "
+          f"{errors} errors ({errors / max(total, 1):.2%})")
+    print(f"{'endpoint':<32}{'reqs':>8}{'err%':>8}{'req/s':>9}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for r in rows:
+        print(f"{r['endpoint']:<32}{r['requests']:>8}{r['error_rate']:>8.2%}{r['throughput']:>9.1f}"
+              f"{r['p50_ms']:>10.1f}{r['p95_ms']:>10.1f}{r['p99_ms']:>10.1f}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--spawn", action="store_true", help="start a throwaway server on a fresh database")
+    parser.add_argument("--port", type=int, default=8098, help="port for --spawn")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="uvicorn workers for --spawn; set SHARED_STATE_URL when above 1")
+    parser.add_argument("--channel-code", help="existing channel to join; one is created if omitted")
+    parser.add_argument("--users", type=int, default=70)
+    parser.add_argument("--user-prefix", default="load-user-")
+    parser.add_argument("--questions", type=int, default=70)
+    parser.add_argument("--question-source", choices=["session", "random"], default="session",
+                        help="/quiz-questions/ (current frontend) or /questions/random/{count}")
+    parser.add_argument("--submit", choices=["per-answer", "batch"], default="per-answer",
+                        help="one /submit-answer/ per click or a single /submit-answers/ at the end")
+    parser.add_argument("--think-time", type=float, nargs=2, default=[1.0, 5.0], metavar=("MIN", "MAX"))
+    parser.add_argument("--ramp", type=float, default=10.0, help="seconds over which students join")
+    parser.add_argument("--admins", type=int, default=2)
+    parser.add_argument("--admin-interval", type=float, default=5.0)
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--json", help="write the per-endpoint report to this file")
+    args = parser.parse_args()
+
+    if args.spawn:
+        with tempfile.TemporaryDirectory() as workdir:
+            server = start_server(workdir, args.port, args.workers)
+            try:
+                elapsed, rows = asyncio.run(run(args, f"http://127.0.0.1:{args.port}"))
+            finally:
+                server.terminate()
+                server.wait()
+    else:
+        elapsed, rows = asyncio.run(run(args, args.base_url))
+
+    print_report(elapsed, rows)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"elapsed": elapsed, "args": vars(args), "endpoints": rows}, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,33 @@
+"""Helpers for starting a throwaway backend server for benchmarks."""
+import asyncio
+import os
+import subprocess
+import sys
+
+import httpx
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def start_server(workdir, port, workers=1, **env_overrides):
+    """Seed a fresh SQLite database in workdir and start uvicorn on it.
+
+    More than one worker needs SHARED_STATE_URL in the environment to keep them coherent.
+    """
+    env = dict(os.environ, DATABASE_URL="sqlite:///./quiz.db", **env_overrides)
+    subprocess.run([sys.executable, os.path.join(BACKEND_DIR, "seed_questions.py")], cwd=workdir, env=env,
+                   check=True, stdout=subprocess.DEVNULL)
+    env["PYTHONPATH"] = BACKEND_DIR
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--workers", str(workers),
+         "--log-level", "warning"],
+        cwd=workdir, env=env
+    )
+
+async def wait_ready(client):
+    for _ in range(100):
+        try:
+            await client.get("/questions/random/1")
+            return
+        except httpx.TransportError:
+            await asyncio.sleep(0.1)
+    raise RuntimeError("server did not start")
@@ -1,10 +1,85 @@
-from sqlalchemy import create_engine, Column, Integer, String, Boolean, ForeignKey, DateTime
+from sqlalchemy import create_engine, event, DDL, Index, Column, Integer, String, Boolean, ForeignKey, DateTime, LargeBinary
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker, relationship
+from sqlalchemy.orm import sessionmaker, relationship, validates
 from datetime import datetime
+import hashlib
+import os
+import re
+import unicodedata
+
+SQLALCHEMY_DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./quiz.db")
+IS_SQLITE = SQLALCHEMY_DATABASE_URL.startswith("sqlite")
+
+# SQLite tuning; each pragma can be overridden from the environment
+SQLITE_PRAGMAS = {
+    "journal_mode": os.getenv("SQLITE_JOURNAL_MODE", "WAL"),
+    "synchronous": os.getenv("SQLITE_SYNCHRONOUS", "NORMAL"),
+    "busy_timeout": int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000")),
+    "mmap_size": int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024))),
+    # Negative values are KiB, so this is a 64 MB page cache per connection
+    "cache_size": int(os.getenv("SQLITE_CACHE_SIZE", "-64000")),
+    "temp_store": os.getenv("SQLITE_TEMP_STORE", "MEMORY"),
+    # Enforces ON DELETE CASCADE. Off by default: older databases were created
+    # without enforced constraints and seed_questions.py replaces questions in place
+    "foreign_keys": os.getenv("SQLITE_FOREIGN_KEYS", "OFF"),
+}
+
+if IS_SQLITE:
+    connect_args = {
+        "check_same_thread": False,
+        "timeout": SQLITE_PRAGMAS["busy_timeout"] / 1000,
+    }
+else:
+    connect_args = {}
+
+POOL_SETTINGS = {
+    "pool_size": int(os.getenv("DB_POOL_SIZE", "10")),
+    "max_overflow": int(os.getenv("DB_MAX_OVERFLOW", "20")),
+    "pool_timeout": int(os.getenv("DB_POOL_TIMEOUT", "30")),
+    # Recycle server connections before idle timeouts on the database side drop them
+    "pool_recycle": int(os.getenv("DB_POOL_RECYCLE", "1800")),
+    "pool_pre_ping": os.getenv("DB_POOL_PRE_PING", "false" if IS_SQLITE else "true").lower() == "true",
+}
+
+engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args=connect_args, **POOL_SETTINGS)
+
+def set_sqlite_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    for name, value in SQLITE_PRAGMAS.items():
+        cursor.execute(f"PRAGMA {name}={value}")
+    cursor.close()
+
+if IS_SQLITE:
+    event.listen(engine, "connect", set_sqlite_pragmas)
+
+# Optional asyncio engine (aiosqlite/asyncpg) used by the async request path
+DB_ASYNC = os.getenv("DB_ASYNC", "false").lower() == "true"
+
+def to_async_url(url):
+    if url.startswith("sqlite:"):
+        return "sqlite+aiosqlite:" + url[len("sqlite:"):]
+    if url.startswith("postgresql:"):
+        return "postgresql+asyncpg:" + url[len("postgresql:"):]
+    return url
+
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL") or to_async_url(SQLALCHEMY_DATABASE_URL)
+async_engine = None
+AsyncSessionLocal = None
+
+if DB_ASYNC:
+    from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+    from sqlalchemy.pool import AsyncAdaptedQueuePool
+    async_engine = create_async_engine(
+        ASYNC_DATABASE_URL,
+        connect_args={"timeout": connect_args["timeout"]} if IS_SQLITE else {},
+        # aiosqlite defaults to NullPool; keep connections (and their pragmas) pooled
+        poolclass=AsyncAdaptedQueuePool,
+        **POOL_SETTINGS
+    )
+    if IS_SQLITE:
+        event.listen(async_engine.sync_engine, "connect", set_sqlite_pragmas)
+    AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
 
-SQLALCHEMY_DATABASE_URL = "sqlite:///./quiz.db"
-engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
@@ -15,9 +90,11 @@ class Channel(Base):
     code = Column(String, unique=True, index=True)
     admin_id = Column(Integer, ForeignKey("users.id"))
     created_at = Column(DateTime, default=datetime.utcnow)
+    # Quiz length for participants of this channel; NULL means QUIZ_DURATION_MINUTES
+    duration_minutes = Column(Integer, nullable=True)
     
     admin = relationship("User", back_populates="channels")
-    participants = relationship("Participant", back_populates="channel")
+    participants = relationship("Participant", back_populates="channel", cascade="all, delete-orphan", passive_deletes=True)
 
 class User(Base):
     __tablename__ = "users"
@@ -39,26 +116,81 @@ class Question(Base):
     option_c = Column(String)
     option_d = Column(String)
     correct_answer = Column(String)
+    # sha256 of the normalised text, for exact-duplicate checks
+    text_hash = Column(String(64), unique=True, index=True, nullable=True)
+    
+    @validates("text")
+    def set_text_hash(self, key, value):
+        self.text_hash = question_text_hash(value) if value is not None else None
+        return value
+
+def normalize_question_text(value):
+    """Case, Unicode form and whitespace folded so near-identical texts compare equal."""
+    return re.sub(r"\s+", " ", unicodedata.normalize("NFKC", value).casefold()).strip()
+
+def question_text_hash(value):
+    return hashlib.sha256(normalize_question_text(value).encode()).hexdigest()
+
+# Full-text index over the question bank, kept in sync by triggers (SQLite FTS5)
+QUESTION_FTS_COLUMNS = "text, option_a, option_b, option_c, option_d"
+_fts_insert = ("INSERT INTO questions_fts(rowid, text, option_a, option_b, option_c, option_d) "
+               "VALUES (new.id, new.text, new.option_a, new.option_b, new.option_c, new.option_d);")
+_fts_delete = ("INSERT INTO questions_fts(questions_fts, rowid, text, option_a, option_b, option_c, option_d) "
+               "VALUES ('delete', old.id, old.text, old.option_a, old.option_b, old.option_c, old.option_d);")
+QUESTION_FTS_DDL = [
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS questions_fts USING fts5({QUESTION_FTS_COLUMNS}, content='questions', content_rowid='id')",
+    f"CREATE TRIGGER IF NOT EXISTS questions_fts_ai AFTER INSERT ON questions BEGIN {_fts_insert} END",
+    f"CREATE TRIGGER IF NOT EXISTS questions_fts_ad AFTER DELETE ON questions BEGIN {_fts_delete} END",
+    f"CREATE TRIGGER IF NOT EXISTS questions_fts_au AFTER UPDATE OF {QUESTION_FTS_COLUMNS} ON questions "
+    f"BEGIN {_fts_delete} {_fts_insert} END",
+]
+for statement in QUESTION_FTS_DDL:
+    event.listen(Question.__table__, "after_create", DDL(statement).execute_if(dialect="sqlite"))
 
 class Participant(Base):
     __tablename__ = "participants"
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"))
-    channel_id = Column(Integer, ForeignKey("channels.id"))
+    channel_id = Column(Integer, ForeignKey("channels.id", ondelete="CASCADE"))
     score = Column(Integer, default=0)
     quiz_started_at = Column(DateTime, default=datetime.utcnow)
     quiz_submitted = Column(Boolean, default=False)
+    # Set once at first join; answers after it (plus grace) are rejected and the sweeper submits the quiz
+    deadline_at = Column(DateTime, nullable=True, index=True)
+    # Question set drawn at join time, packed as little-endian uint32 ids
+    question_ids = Column(LargeBinary, nullable=True)
     
     user = relationship("User", back_populates="participants")
     channel = relationship("Channel", back_populates="participants")
+    answers = relationship("Answer", cascade="all, delete-orphan", passive_deletes=True)
+    
+    __table_args__ = (
+        Index("ix_participants_user_channel", "user_id", "channel_id", unique=True),
+    )
 
 class Answer(Base):
     __tablename__ = "answers"
     id = Column(Integer, primary_key=True, index=True)
-    participant_id = Column(Integer, ForeignKey("participants.id"))
-    question_id = Column(Integer, ForeignKey("questions.id"))
+    participant_id = Column(Integer, ForeignKey("participants.id", ondelete="CASCADE"))
+    question_id = Column(Integer, ForeignKey("questions.id"), index=True)
     selected_answer = Column(String)
     is_correct = Column(Boolean)
+    
+    __table_args__ = (
+        Index("ix_answers_participant_question", "participant_id", "question_id", unique=True),
+    )
+
+def answer_upsert(rows):
+    """INSERT ... ON CONFLICT (participant_id, question_id) DO UPDATE for answer rows."""
+    if engine.dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    stmt = insert(Answer).values(rows)
+    return stmt.on_conflict_do_update(
+        index_elements=[Answer.participant_id, Answer.question_id],
+        set_={"selected_answer": stmt.excluded.selected_answer, "is_correct": stmt.excluded.is_correct}
+    )
 
 Base.metadata.create_all(bind=engine)
 
@@ -67,4 +199,8 @@ def get_db():
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -0,0 +1,93 @@
+"""Generate synthetic channels, participants and answers for benchmarking.
+
+seed_questions.py only creates questions; this fills the results tables at
+scale. Run it after seeding:
+
+    python generate_data.py --answers 100000 --channels 5
+"""
+import argparse
+import random
+
+from sqlalchemy import func, insert, text
+
+from database import SessionLocal, engine, User, Channel, Question, Participant, Answer
+from question_bank import pack_question_ids
+
+def next_id(db, model):
+    return (db.query(func.max(model.id)).scalar() or 0) + 1
+
+def generate_results(db, answers, channels=1, answers_per_participant=70, seed=0, prefix="synthetic"):
+    """Insert about `answers` answers spread over `channels` channels; returns the new channel ids."""
+    rng = random.Random(seed)
+    questions = db.query(Question.id, Question.correct_answer).all()
+    if not questions:
+        raise RuntimeError("No questions found; run seed_questions.py first")
+    per_participant = min(answers_per_participant, len(questions))
+    participants = max(1, answers // per_participant)
+
+    admin = db.query(User).filter(User.username == "admin").first()
+    if not admin:
+        admin = User(username="admin", password="admin123", is_admin=True)
+        db.add(admin)
+        db.flush()
+
+    channel_id = next_id(db, Channel)
+    user_id = next_id(db, User)
+    participant_id = next_id(db, Participant)
+    tag = f"{prefix}-{user_id}"
+
+    channel_rows = [
+        {"id": channel_id + i, "name": f"{tag}-{i}", "code": f"{tag}-{i}", "admin_id": admin.id}
+        for i in range(channels)
+    ]
+    user_rows = []
+    participant_rows = []
+    answer_rows = []
+    for i in range(participants):
+        drawn = rng.sample(questions, per_participant)
+        score = 0
+        for question_id, correct_answer in drawn:
+            selected = correct_answer if rng.random() < 0.6 else rng.choice("ABCD")
+            is_correct = selected == correct_answer
+            score += is_correct
+            answer_rows.append({
+                "participant_id": participant_id + i,
+                "question_id": question_id,
+                "selected_answer": selected,
+                "is_correct": is_correct
+            })
+        user_rows.append({"id": user_id + i, "username": f"{tag}-user{i}", "is_admin": False})
+        participant_rows.append({
+            "id": participant_id + i,
+            "user_id": user_id + i,
+            "channel_id": channel_id + i % channels,
+            "score": score,
+            "quiz_submitted": True,
+            "question_ids": pack_question_ids([q for q, _ in drawn])
+        })
+
+    db.execute(insert(Channel), channel_rows)
+    db.execute(insert(User), user_rows)
+    db.execute(insert(Participant), participant_rows)
+    db.execute(insert(Answer), answer_rows)
+    if engine.dialect.name == "postgresql":
+        # Explicit ids bypass the serial sequences; move them past the new rows
+        for table in ("channels", "users", "participants"):
+            db.execute(text(f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), (SELECT MAX(id) FROM {table}))"))
+    db.commit()
+    return [row["id"] for row in channel_rows]
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate synthetic quiz results")
+    parser.add_argument("--answers", type=int, default=10000)
+    parser.add_argument("--channels", type=int, default=1)
+    parser.add_argument("--answers-per-participant", type=int, default=70)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        channel_ids = generate_results(db, args.answers, args.channels, args.answers_per_participant, args.seed)
+    finally:
+        db.close()
+    print(f"Generated about {args.answers} answers in channels {channel_ids}")
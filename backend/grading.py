@@ -0,0 +1,67 @@
+import threading
+from typing import NamedTuple
+
+from question_bank import question_bank
+
+ANSWER_CODES = {"A": 0, "B": 1, "C": 2, "D": 3}
+# Key entries for ids with no question, and for questions whose stored key isn't A-D
+NO_QUESTION = 0xFF
+INVALID_KEY = 0xFE
+
+class AnswerKey(NamedTuple):
+    version: int
+    # codes[question_id] is the correct option as 0-3
+    codes: bytes
+
+def build_key(version, records):
+    codes = bytearray([NO_QUESTION]) * (max((r.id for r in records), default=0) + 1)
+    for record in records:
+        codes[record.id] = ANSWER_CODES.get(record.correct_answer, INVALID_KEY)
+    return AnswerKey(version=version, codes=bytes(codes))
+
+class AnswerKeyCache:
+    """Correct answers for the whole bank, rebuilt when the bank version changes."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._key = None
+
+    def cached(self):
+        """The key if it matches the current bank version, without touching the database; otherwise None."""
+        key = self._key
+        if key is not None and key.version == question_bank.version:
+            return key
+        return None
+
+    def get(self, db):
+        key = self.cached()
+        if key is not None:
+            return key
+        with self._lock:
+            version = question_bank.version
+            if self._key is None or self._key.version != version:
+                self._key = build_key(version, question_bank.records(db))
+            return self._key
+
+    def grade(self, db, selected):
+        return grade_with(self.get(db), selected)
+
+def grade_with(key, selected):
+    """Grade {question_id: selected_answer} against an answer key in one pass.
+
+    Returns ({question_id: (selected_answer, is_correct)}, missing question ids).
+    """
+    codes = key.codes
+    size = len(codes)
+    graded = {}
+    missing = []
+    for question_id, selected_answer in selected.items():
+        code = codes[question_id] if 0 <= question_id < size else NO_QUESTION
+        if code == NO_QUESTION:
+            missing.append(question_id)
+            continue
+        # Like the SQL re-grade, a question without a valid key marks nothing correct
+        graded[question_id] = (selected_answer, code == ANSWER_CODES.get(selected_answer))
+    return graded, missing
+
+answer_keys = AnswerKeyCache()
@@ -0,0 +1,95 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from sqlalchemy import select
+from database import User, Channel, Participant
+from shared_state import shared_state
+
+IDENTITY_CACHE_SIZE = int(os.getenv("IDENTITY_CACHE_SIZE", "10000"))
+IDENTITY_CACHE_TTL = int(os.getenv("IDENTITY_CACHE_TTL", "3600"))
+
+class IdentityCache:
+    """Bounded LRU cache with TTL: (username, channel_code) -> (participant_id, channel_id, deadline_at)."""
+
+    def __init__(self, maxsize=IDENTITY_CACHE_SIZE, ttl=IDENTITY_CACHE_TTL):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+
+    def get(self, username, channel_code):
+        key = (username, channel_code)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[1] < time.monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, username, channel_code, participant_id, channel_id, deadline_at=None):
+        with self._lock:
+            self._entries[(username, channel_code)] = ((participant_id, channel_id, deadline_at), time.monotonic() + self.ttl)
+            self._entries.move_to_end((username, channel_code))
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    # Invalidations apply to every worker's cache; see shared_state
+    def invalidate_channel(self, channel_id):
+        shared_state.broadcast("identity.invalidate_channel", channel_id=channel_id)
+
+    def invalidate_user(self, username):
+        shared_state.broadcast("identity.invalidate_user", username=username)
+
+    def clear(self):
+        shared_state.broadcast("identity.clear")
+
+    def _invalidate_channel(self, data):
+        with self._lock:
+            for key in [k for k, (value, _) in self._entries.items() if value[1] == data["channel_id"]]:
+                del self._entries[key]
+
+    def _invalidate_user(self, data):
+        with self._lock:
+            for key in [k for k in self._entries if k[0] == data["username"]]:
+                del self._entries[key]
+
+    def _clear(self, data=None):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0
+            }
+
+def participant_lookup(username, channel_code):
+    return select(Participant.id, Participant.channel_id, Participant.deadline_at) \
+        .join(User, User.id == Participant.user_id) \
+        .join(Channel, Channel.id == Participant.channel_id) \
+        .where(User.username == username, Channel.code == channel_code)
+
+def lookup_failure(user_id, channel_id):
+    if user_id is None or channel_id is None:
+        return "User or channel not found"
+    return "Participant not found"
+
+identity_cache = IdentityCache()
+shared_state.on("identity.invalidate_channel", identity_cache._invalidate_channel)
+shared_state.on("identity.invalidate_user", identity_cache._invalidate_user)
+shared_state.on("identity.clear", identity_cache._clear)
+shared_state.on_resync(identity_cache._clear)
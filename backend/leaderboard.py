@@ -0,0 +1,113 @@
+import threading
+from bisect import bisect_left, insort
+
+from database import Participant, User
+from shared_state import shared_state
+
+class ChannelBoard:
+    """Participants of one channel kept ordered by (score desc, join order).
+
+    Lookups and rank queries are binary searches over the sorted key list.
+    """
+
+    def __init__(self):
+        self.keys = []
+        self.entries = {}
+        self.by_username = {}
+
+    def set(self, participant_id, username, score, submitted):
+        entry = self.entries.get(participant_id)
+        if entry is not None:
+            old_key = (-entry["score"], participant_id)
+            if entry["score"] != score:
+                del self.keys[bisect_left(self.keys, old_key)]
+                insort(self.keys, (-score, participant_id))
+        else:
+            insort(self.keys, (-score, participant_id))
+        if submitted is None:
+            submitted = entry["submitted"] if entry is not None else False
+        self.entries[participant_id] = {"username": username, "score": score, "submitted": submitted}
+        self.by_username[username] = participant_id
+
+    def rank_of_score(self, score):
+        # Competition ranking: ties share the rank of the first entry with that score
+        return bisect_left(self.keys, (-score, -1)) + 1
+
+    def slice(self, start, stop):
+        result = []
+        for _, participant_id in self.keys[max(start, 0):stop]:
+            entry = self.entries[participant_id]
+            result.append({
+                "rank": self.rank_of_score(entry["score"]),
+                "username": entry["username"],
+                "score": entry["score"],
+                "submitted": entry["submitted"]
+            })
+        return result
+
+    def position(self, username):
+        participant_id = self.by_username.get(username)
+        if participant_id is None:
+            return None
+        return bisect_left(self.keys, (-self.entries[participant_id]["score"], participant_id))
+
+class Leaderboards:
+    """Per-channel boards, loaded from the database on first use and then
+    maintained incrementally by the answer/submit routes."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._boards = {}
+
+    def _board(self, db, channel_id):
+        board = self._boards.get(channel_id)
+        if board is None:
+            board = ChannelBoard()
+            rows = db.query(Participant.id, User.username, Participant.score, Participant.quiz_submitted) \
+                .join(User, User.id == Participant.user_id) \
+                .filter(Participant.channel_id == channel_id).all()
+            for participant_id, username, score, submitted in rows:
+                board.set(participant_id, username, score or 0, bool(submitted))
+            self._boards[channel_id] = board
+        return board
+
+    def update(self, channel_id, participant_id, username, score, submitted=None):
+        # Every worker keeps its own copy of the boards it has loaded
+        shared_state.broadcast("leaderboard.update", channel_id=channel_id, participant_id=participant_id,
+                               username=username, score=score, submitted=submitted)
+
+    def _update(self, data):
+        with self._lock:
+            board = self._boards.get(data["channel_id"])
+            # Boards that are not loaded yet will read the committed row on first use
+            if board is not None:
+                board.set(data["participant_id"], data["username"], data["score"], data["submitted"])
+
+    def top(self, db, channel_id, limit):
+        with self._lock:
+            board = self._board(db, channel_id)
+            return len(board.keys), board.slice(0, limit)
+
+    def around(self, db, channel_id, username, window):
+        with self._lock:
+            board = self._board(db, channel_id)
+            position = board.position(username)
+            if position is None:
+                return len(board.keys), None
+            return len(board.keys), board.slice(position - window, position + window + 1)
+
+    def drop(self, channel_id=None):
+        shared_state.broadcast("leaderboard.drop", channel_id=channel_id)
+
+    def _drop(self, data=None):
+        channel_id = data["channel_id"] if data else None
+        with self._lock:
+            if channel_id is None:
+                self._boards.clear()
+            else:
+                self._boards.pop(channel_id, None)
+
+leaderboards = Leaderboards()
+shared_state.on("leaderboard.update", leaderboards._update)
+shared_state.on("leaderboard.drop", leaderboards._drop)
+shared_state.on_resync(leaderboards._drop)
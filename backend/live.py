@@ -0,0 +1,95 @@
+import asyncio
+import json
+import os
+import threading
+
+from shared_state import shared_state
+
+LIVE_TICK_MS = int(os.getenv("LIVE_TICK_MS", "1000"))
+LIVE_QUEUE_SIZE = int(os.getenv("LIVE_QUEUE_SIZE", "32"))
+
+class LiveHub:
+    """Fan-out of channel events to Server-Sent Events subscribers.
+
+    Routes publish from the threadpool; events are coalesced per channel and
+    flushed to every subscriber once per tick, so a client receives at most
+    one message per tick no matter how busy the room is.
+    """
+
+    def __init__(self, tick_ms=LIVE_TICK_MS):
+        self.tick = tick_ms / 1000
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._subscribers = {}
+
+    def _batch(self, channel_code):
+        batch = self._pending.get(channel_code)
+        if batch is None:
+            batch = {"joined": [], "scores": {}, "submitted": []}
+            self._pending[channel_code] = batch
+        return batch
+
+    # Events reach subscribers connected to any worker; see shared_state
+    def joined(self, channel_code, username):
+        shared_state.broadcast("live.joined", channel_code=channel_code, username=username)
+
+    def score(self, channel_code, username, score):
+        shared_state.broadcast("live.score", channel_code=channel_code, username=username, score=score)
+
+    def submitted(self, channel_code, username, score):
+        shared_state.broadcast("live.submitted", channel_code=channel_code, username=username, score=score)
+
+    def _joined(self, data):
+        with self._lock:
+            if data["channel_code"] in self._subscribers:
+                self._batch(data["channel_code"])["joined"].append(data["username"])
+
+    def _score(self, data):
+        with self._lock:
+            if data["channel_code"] in self._subscribers:
+                # Only the latest score per user within a tick is sent
+                self._batch(data["channel_code"])["scores"][data["username"]] = data["score"]
+
+    def _submitted(self, data):
+        with self._lock:
+            if data["channel_code"] in self._subscribers:
+                batch = self._batch(data["channel_code"])
+                batch["scores"][data["username"]] = data["score"]
+                batch["submitted"].append(data["username"])
+
+    def subscribe(self, channel_code):
+        queue = asyncio.Queue(maxsize=LIVE_QUEUE_SIZE)
+        with self._lock:
+            self._subscribers.setdefault(channel_code, set()).add(queue)
+        return queue
+
+    def unsubscribe(self, channel_code, queue):
+        with self._lock:
+            queues = self._subscribers.get(channel_code)
+            if queues is not None:
+                queues.discard(queue)
+                if not queues:
+                    del self._subscribers[channel_code]
+                    self._pending.pop(channel_code, None)
+
+    def flush(self):
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            targets = {code: list(self._subscribers.get(code, ())) for code in pending}
+        for channel_code, batch in pending.items():
+            message = json.dumps({"channel_code": channel_code, **batch})
+            for queue in targets[channel_code]:
+                if queue.full():
+                    # Slow consumer: drop its oldest update rather than grow without bound
+                    queue.get_nowait()
+                queue.put_nowait(message)
+
+    async def run(self):
+        while True:
+            await asyncio.sleep(self.tick)
+            self.flush()
+
+live_hub = LiveHub()
+shared_state.on("live.joined", live_hub._joined)
+shared_state.on("live.score", live_hub._score)
+shared_state.on("live.submitted", live_hub._submitted)
@@ -1,11 +1,39 @@
-from fastapi import FastAPI, Depends, HTTPException
+from fastapi import BackgroundTasks, FastAPI, Depends, File, HTTPException, Query, Request, Response, UploadFile
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
+from sqlalchemy import delete, func, select
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
-from database import get_db, User, Channel, Question, Participant, Answer
-from pydantic import BaseModel
+from database import get_db, SessionLocal, DB_ASYNC, engine, async_engine, User, Channel, Question, Participant, Answer, question_text_hash
+from question_bank import question_bank, to_json, pack_question_ids, unpack_question_ids
+from question_packs import question_packs, pack_response
+from question_io import FORMATS, detect_format, import_questions, export_questions
+from question_search import question_search
+from leaderboard import leaderboards
+from live import live_hub
+from scoring import apply_answers, current_score, mark_submitted, find_score_drift, repair_score_drift, regrade_question, regrade_channel
+from grading import answer_keys
+from analytics import channel_analytics
+from answer_buffer import ANSWER_BUFFER, answer_buffer, record_answers
+from identity_cache import identity_cache, participant_lookup, lookup_failure
+from metrics import metrics, instrument_engine, MetricsMiddleware
+from shared_state import shared_state
+from quiz_timer import DEADLINE_SWEEP_INTERVAL, DEADLINE_SWEEP_BATCH_SIZE, deadline_for, seconds_remaining, check_deadline, submit_expired
+from schemas import (
+    UserCreate, ChannelCreate, JoinChannel, SubmitAnswer, AdminLogin,
+    QuestionCreate, QuestionUpdate, UserCreateAdmin, PasswordUpdate
+)
 from datetime import datetime
+from typing import List, Optional
+from starlette.concurrency import run_in_threadpool
+import asyncio
+import codecs
+import json
+import logging
+import os
 import random
 import string
+import time
 
 app = FastAPI()
 
@@ -16,49 +44,119 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
-
-class UserCreate(BaseModel):
-    username: str
-    is_admin: bool = False
-
-class ChannelCreate(BaseModel):
-    name: str
-
-class JoinChannel(BaseModel):
-    code: str
-    username: str
-
-class SubmitAnswer(BaseModel):
-    question_id: int
-    selected_answer: str
-
-class AdminLogin(BaseModel):
-    username: str
-    password: str
-
-class QuestionCreate(BaseModel):
-    text: str
-    option_a: str
-    option_b: str
-    option_c: str
-    option_d: str
-    correct_answer: str
-
-class QuestionUpdate(BaseModel):
-    text: str
-    option_a: str
-    option_b: str
-    option_c: str
-    option_d: str
-    correct_answer: str
-
-class UserCreateAdmin(BaseModel):
-    username: str
-    password: str
-
-class PasswordUpdate(BaseModel):
-    current_password: str
-    new_password: str
+app.add_middleware(MetricsMiddleware)
+
+instrument_engine(engine)
+if async_engine is not None:
+    instrument_engine(async_engine.sync_engine)
+
+metrics.register_gauges(lambda: [
+    ("quiz_identity_cache_hits", "Identity cache hits since start", identity_cache.hits),
+    ("quiz_identity_cache_misses", "Identity cache misses since start", identity_cache.misses),
+    ("quiz_question_bank_version", "Question bank version", question_bank.version),
+    ("quiz_answer_buffer_rows", "Answers waiting in the write-behind buffer", answer_buffer.rows),
+    ("quiz_answer_buffer_flushed_rows", "Answers written by the write-behind buffer since start", answer_buffer.flushed_rows),
+])
+
+logger = logging.getLogger("quiz")
+
+# Seconds between score consistency sweeps; 0 disables the sweep
+SCORE_CHECK_INTERVAL = int(os.getenv("SCORE_CHECK_INTERVAL", "300"))
+
+def repair_scores(channel_id=None):
+    db = SessionLocal()
+    try:
+        repaired = repair_score_drift(db, channel_id)
+    finally:
+        db.close()
+    if repaired:
+        leaderboards.drop(channel_id)
+    return repaired
+
+def apply_regrade(db, regrade, channel_id=None):
+    # Buffered answers may have been graded against the old key
+    if ANSWER_BUFFER:
+        answer_buffer.flush()
+    changed = regrade(db)
+    db.commit()
+    if changed:
+        leaderboards.drop(channel_id)
+    return changed
+
+async def score_consistency_loop():
+    while True:
+        await asyncio.sleep(SCORE_CHECK_INTERVAL)
+        # One sweep per interval across all workers
+        if not shared_state.acquire("score-check", SCORE_CHECK_INTERVAL - 1):
+            continue
+        try:
+            repaired = await run_in_threadpool(repair_scores)
+        except Exception:
+            logger.exception("Score consistency check failed")
+            continue
+        if repaired:
+            logger.warning("Repaired %d drifted participant scores", repaired)
+
+def sweep_deadlines():
+    """Auto-submit participants whose deadline has passed; returns the rows submitted."""
+    # Buffered answers count towards the final score
+    if ANSWER_BUFFER:
+        answer_buffer.flush()
+    db = SessionLocal()
+    try:
+        submitted = []
+        while True:
+            rows = submit_expired(db)
+            submitted.extend(rows)
+            if len(rows) < DEADLINE_SWEEP_BATCH_SIZE:
+                return submitted
+    finally:
+        db.close()
+
+async def deadline_sweep_loop():
+    while True:
+        await asyncio.sleep(DEADLINE_SWEEP_INTERVAL)
+        if not shared_state.acquire("deadline-sweep", DEADLINE_SWEEP_INTERVAL - 1):
+            continue
+        try:
+            submitted = await run_in_threadpool(sweep_deadlines)
+        except Exception:
+            logger.exception("Deadline sweep failed")
+            continue
+        for row in submitted:
+            leaderboards.update(row.channel_id, row.id, row.username, row.score or 0, True)
+            live_hub.submitted(row.code, row.username, row.score or 0)
+        if submitted:
+            logger.info("Auto-submitted %d participants past their deadline", len(submitted))
+
+background_tasks = []
+
+@app.on_event("startup")
+async def start_background_tasks():
+    await run_in_threadpool(shared_state.start)
+    background_tasks.append(asyncio.create_task(live_hub.run()))
+    if ANSWER_BUFFER:
+        if shared_state.multi_worker:
+            logger.warning("ANSWER_BUFFER keeps answers in this worker; run a single worker with it")
+        answer_buffer.start()
+    if SCORE_CHECK_INTERVAL > 0:
+        background_tasks.append(asyncio.create_task(score_consistency_loop()))
+    if DEADLINE_SWEEP_INTERVAL > 0:
+        background_tasks.append(asyncio.create_task(deadline_sweep_loop()))
+
+@app.on_event("shutdown")
+async def stop_background_tasks():
+    for task in background_tasks:
+        task.cancel()
+    background_tasks.clear()
+    if ANSWER_BUFFER:
+        await run_in_threadpool(answer_buffer.stop)
+    await run_in_threadpool(shared_state.stop)
+
+if DB_ASYNC:
+    # Registered first so the async participant routes take precedence over the sync ones below
+    from async_routes import router as async_router
+    app.include_router(async_router)
 
 def generate_code():
     return ''.join(random.choices(string.ascii_uppercase + string.digits, k=6))
@@ -82,8 +180,11 @@ def create_channel(channel: ChannelCreate, admin_username: str, db: Session = De
     if existing:
         raise HTTPException(status_code=409, detail="Channel name already exists")
     
+    if channel.duration_minutes is not None and channel.duration_minutes <= 0:
+        raise HTTPException(status_code=400, detail="Duration must be a positive number of minutes")
+    
     code = generate_code()
-    db_channel = Channel(name=channel.name, code=code, admin_id=admin.id)
+    db_channel = Channel(name=channel.name, code=code, admin_id=admin.id, duration_minutes=channel.duration_minutes)
     db.add(db_channel)
     db.commit()
     db.refresh(db_channel)
@@ -111,102 +212,193 @@ def join_channel(join_data: JoinChannel, db: Session = Depends(get_db)):
         if existing.quiz_submitted:
             raise HTTPException(status_code=400, detail="You have already completed this quiz")
         else:
-            # Reset timer for existing participant who hasn't submitted
-            existing.quiz_started_at = datetime.utcnow()
+            # Re-joining keeps the original start time and deadline
+            if existing.deadline_at is None:
+                existing.deadline_at = deadline_for(existing.quiz_started_at or datetime.utcnow(), channel.duration_minutes)
+            if existing.question_ids is None:
+                existing.question_ids = pack_question_ids(question_bank.draw_ids(db, f"{channel.id}:{existing.id}"))
             db.commit()
             participant = existing
     else:
-        participant = Participant(user_id=user.id, channel_id=channel.id, quiz_started_at=datetime.utcnow())
+        started_at = datetime.utcnow()
+        participant = Participant(user_id=user.id, channel_id=channel.id, quiz_started_at=started_at,
+                                  deadline_at=deadline_for(started_at, channel.duration_minutes))
         db.add(participant)
-        db.commit()
-        db.refresh(participant)
+        try:
+            db.flush()
+            participant.question_ids = pack_question_ids(question_bank.draw_ids(db, f"{channel.id}:{participant.id}"))
+            db.commit()
+        except IntegrityError:
+            # A concurrent join created the participant first
+            db.rollback()
+            participant = db.query(Participant).filter(
+                Participant.user_id == user.id,
+                Participant.channel_id == channel.id
+            ).first()
+        else:
+            db.refresh(participant)
+    identity_cache.put(user.username, channel.code, participant.id, channel.id, participant.deadline_at)
+    leaderboards.update(channel.id, participant.id, user.username, participant.score or 0)
+    live_hub.joined(channel.code, user.username)
     
     return {
         "message": "Joined successfully", 
         "channel": channel.name,
-        "quiz_started_at": participant.quiz_started_at.isoformat()
+        "quiz_started_at": participant.quiz_started_at.isoformat(),
+        "deadline_at": participant.deadline_at.isoformat(),
+        "seconds_remaining": seconds_remaining(participant.deadline_at)
     }
 
+@app.get("/metrics")
+def get_metrics():
+    return Response(content=metrics.render(), media_type="text/plain; version=0.0.4")
+
 @app.get("/questions/")
-def get_questions(db: Session = Depends(get_db)):
-    return db.query(Question).all()
+def get_questions(request: Request, db: Session = Depends(get_db)):
+    # Pre-compressed pack with a strong ETag per encoding; repeat loads are 304s
+    return pack_response(request, question_packs.get(db))
 
 @app.get("/questions/random/{count}")
 def get_random_questions(count: int, db: Session = Depends(get_db)):
-    import random
-    all_questions = db.query(Question).all()
-    if len(all_questions) <= count:
-        return all_questions
-    return random.sample(all_questions, count)
+    # Served from the in-memory question bank; no table scan per request
+    return Response(content=to_json(question_bank.sample(db, count)), media_type="application/json")
+
+def resolve_participant(db: Session, username: str, channel_code: str):
+    """Return (participant_id, channel_id, deadline_at), from the identity cache when possible."""
+    cached = identity_cache.get(username, channel_code)
+    if cached is not None:
+        return cached
+    
+    row = db.execute(participant_lookup(username, channel_code)).first()
+    if row is None:
+        user_id = db.query(User.id).filter(User.username == username).scalar()
+        channel_id = db.query(Channel.id).filter(Channel.code == channel_code).scalar()
+        raise HTTPException(status_code=404, detail=lookup_failure(user_id, channel_id))
+    
+    identity_cache.put(username, channel_code, row.id, row.channel_id, row.deadline_at)
+    return row.id, row.channel_id, row.deadline_at
+
+@app.get("/quiz-questions/")
+def get_quiz_questions(username: str, channel_code: str, db: Session = Depends(get_db)):
+    # The participant's question set, drawn once at join time
+    participant_id, channel_id, _ = resolve_participant(db, username, channel_code)
+    packed = db.query(Participant.question_ids).filter(Participant.id == participant_id).scalar()
+    if packed is None:
+        # Joined before question sets were stored
+        packed = pack_question_ids(question_bank.draw_ids(db, f"{channel_id}:{participant_id}"))
+        db.query(Participant).filter(Participant.id == participant_id).update(
+            {Participant.question_ids: packed}, synchronize_session=False
+        )
+        db.commit()
+    return Response(
+        content=to_json(question_bank.select(db, unpack_question_ids(packed))),
+        media_type="application/json"
+    )
 
 @app.post("/submit-answer/")
 def submit_answer(answer_data: SubmitAnswer, username: str, channel_code: str, db: Session = Depends(get_db)):
-    user = db.query(User).filter(User.username == username).first()
-    channel = db.query(Channel).filter(Channel.code == channel_code).first()
-    
-    if not user or not channel:
-        raise HTTPException(status_code=404, detail="User or channel not found")
-    
-    participant = db.query(Participant).filter(
-        Participant.user_id == user.id,
-        Participant.channel_id == channel.id
-    ).first()
-    
-    if not participant:
-        raise HTTPException(status_code=404, detail="Participant not found")
-    
-    question = db.query(Question).filter(Question.id == answer_data.question_id).first()
-    is_correct = question.correct_answer == answer_data.selected_answer
+    participant_id, channel_id, deadline_at = resolve_participant(db, username, channel_code)
+    check_deadline(deadline_at)
     
-    existing_answer = db.query(Answer).filter(
-        Answer.participant_id == participant.id,
-        Answer.question_id == answer_data.question_id
-    ).first()
+    graded, missing = answer_keys.grade(db, {answer_data.question_id: answer_data.selected_answer})
+    if missing:
+        raise HTTPException(status_code=404, detail="Question not found")
+    is_correct = graded[answer_data.question_id][1]
     
-    if existing_answer:
-        # Update existing answer
-        existing_answer.selected_answer = answer_data.selected_answer
-        existing_answer.is_correct = is_correct
-        # Recalculate score
-        participant.score = db.query(Answer).filter(
-            Answer.participant_id == participant.id,
-            Answer.is_correct == True
-        ).count()
+    if ANSWER_BUFFER:
+        score = record_answers(db, participant_id, graded)
     else:
-        # Create new answer
-        answer = Answer(
-            participant_id=participant.id,
-            question_id=answer_data.question_id,
-            selected_answer=answer_data.selected_answer,
-            is_correct=is_correct
-        )
-        db.add(answer)
-        if is_correct:
-            participant.score += 1
-    
-    db.commit()
-    return {"correct": is_correct, "score": participant.score}
+        # Score changes by the difference in correctness, applied in SQL
+        score = apply_answers(db, participant_id, graded)
+        db.commit()
+    leaderboards.update(channel_id, participant_id, username, score)
+    live_hub.score(channel_code, username, score)
+    return {"correct": is_correct, "score": score}
+
+@app.post("/submit-answers/")
+def submit_answers(answers: List[SubmitAnswer], username: str, channel_code: str, db: Session = Depends(get_db)):
+    participant_id, channel_id, deadline_at = resolve_participant(db, username, channel_code)
+    check_deadline(deadline_at)
+    
+    # Later entries for the same question win, as they would with sequential calls
+    selected = {a.question_id: a.selected_answer for a in answers}
+    if not selected:
+        return {"results": [], "score": db.execute(current_score(participant_id)).scalar()}
+    
+    graded, missing = answer_keys.grade(db, selected)
+    if missing:
+        raise HTTPException(status_code=404, detail=f"Questions not found: {missing}")
+    
+    if ANSWER_BUFFER:
+        score = record_answers(db, participant_id, graded)
+    else:
+        score = apply_answers(db, participant_id, graded)
+        db.commit()
+    leaderboards.update(channel_id, participant_id, username, score)
+    live_hub.score(channel_code, username, score)
+    return {
+        "results": [{"question_id": question_id, "correct": correct} for question_id, (_, correct) in graded.items()],
+        "score": score
+    }
 
 @app.post("/submit-quiz/")
 def submit_quiz(username: str, channel_code: str, db: Session = Depends(get_db)):
-    user = db.query(User).filter(User.username == username).first()
-    channel = db.query(Channel).filter(Channel.code == channel_code).first()
-    
-    if not user or not channel:
-        raise HTTPException(status_code=404, detail="User or channel not found")
+    participant_id, channel_id, _ = resolve_participant(db, username, channel_code)
+    if ANSWER_BUFFER:
+        # The final score must include every buffered answer
+        answer_buffer.flush(participant_id)
     
-    participant = db.query(Participant).filter(
-        Participant.user_id == user.id,
-        Participant.channel_id == channel.id
-    ).first()
+    db.execute(mark_submitted(participant_id))
+    score = db.execute(current_score(participant_id)).scalar()
+    db.commit()
+    leaderboards.update(channel_id, participant_id, username, score, True)
+    live_hub.submitted(channel_code, username, score)
     
-    if not participant:
-        raise HTTPException(status_code=404, detail="Participant not found")
+    return {"message": "Quiz submitted successfully", "final_score": score}
+
+@app.get("/leaderboard/{channel_code}")
+def get_leaderboard(channel_code: str, limit: int = Query(10, ge=1, le=100), db: Session = Depends(get_db)):
+    channel = db.query(Channel).filter(Channel.code == channel_code).first()
+    if not channel:
+        raise HTTPException(status_code=404, detail="Channel not found")
     
-    participant.quiz_submitted = True
-    db.commit()
+    total, entries = leaderboards.top(db, channel.id, limit)
+    return {"channel": channel.name, "total_participants": total, "entries": entries}
+
+@app.get("/leaderboard/{channel_code}/around/{username}")
+def get_leaderboard_around(channel_code: str, username: str, window: int = Query(5, ge=1, le=50), db: Session = Depends(get_db)):
+    channel = db.query(Channel).filter(Channel.code == channel_code).first()
+    if not channel:
+        raise HTTPException(status_code=404, detail="Channel not found")
     
-    return {"message": "Quiz submitted successfully", "final_score": participant.score}
+    total, entries = leaderboards.around(db, channel.id, username, window)
+    if entries is None:
+        raise HTTPException(status_code=404, detail="Participant not found")
+    return {"channel": channel.name, "total_participants": total, "entries": entries}
+
+@app.get("/channels/{channel_code}/events")
+async def channel_events(channel_code: str, request: Request):
+    queue = live_hub.subscribe(channel_code)
+    
+    async def event_stream():
+        try:
+            yield "retry: 3000\n\n"
+            while not await request.is_disconnected():
+                try:
+                    message = await asyncio.wait_for(queue.get(), timeout=15)
+                except asyncio.TimeoutError:
+                    # Keep-alive comment so proxies don't close an idle stream
+                    yield ": ping\n\n"
+                    continue
+                yield f"data: {message}\n\n"
+        finally:
+            live_hub.unsubscribe(channel_code, queue)
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
 
 @app.post("/admin/login")
 def admin_login(login_data: AdminLogin, db: Session = Depends(get_db)):
@@ -226,17 +418,61 @@ def admin_login(login_data: AdminLogin, db: Session = Depends(get_db)):
 
 @app.post("/admin/questions")
 def add_question(question_data: QuestionCreate, db: Session = Depends(get_db)):
-    # Check if question already exists
-    existing = db.query(Question).filter(Question.text == question_data.text).first()
+    # Check if question already exists (ignoring case and whitespace)
+    existing = db.query(Question.id).filter(Question.text_hash == question_text_hash(question_data.text)).first()
     if existing:
         raise HTTPException(status_code=409, detail="Question already exists")
     
     question = Question(**question_data.dict())
     db.add(question)
-    db.commit()
+    try:
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        raise HTTPException(status_code=409, detail="Question already exists")
     db.refresh(question)
+    question_bank.invalidate()
     return question
 
+@app.post("/admin/questions/import")
+def import_question_file(file: UploadFile = File(...), format: Optional[str] = None, db: Session = Depends(get_db)):
+    fmt = format or detect_format(file.filename, file.content_type)
+    if fmt not in FORMATS:
+        raise HTTPException(status_code=400, detail=f"format must be one of {', '.join(FORMATS)}")
+    # Decoded line by line; TextIOWrapper can't wrap the upload's SpooledTemporaryFile before Python 3.11
+    lines = codecs.iterdecode(file.file, "utf-8-sig")
+    try:
+        report = import_questions(db, lines, fmt)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return report
+
+def stream_question_export(fmt: str):
+    db = SessionLocal()
+    try:
+        yield from export_questions(db, fmt)
+    finally:
+        db.close()
+
+@app.get("/admin/questions/export")
+def export_question_file(format: str = "csv"):
+    if format not in FORMATS:
+        raise HTTPException(status_code=400, detail=f"format must be one of {', '.join(FORMATS)}")
+    media_type = "text/csv" if format == "csv" else "application/x-ndjson"
+    return StreamingResponse(
+        stream_question_export(format),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="questions.{format}"'}
+    )
+
+@app.get("/admin/questions/search")
+def search_questions(q: str, limit: int = 20, db: Session = Depends(get_db)):
+    return Response(content=to_json(question_search.search(db, q, min(limit, 200))), media_type="application/json")
+
+@app.get("/admin/questions/similar")
+def similar_questions(text: str, exclude_id: Optional[int] = None, limit: int = 5, db: Session = Depends(get_db)):
+    return question_search.similar(db, text, min(limit, 50), exclude_id)
+
 @app.put("/admin/questions/{question_id}")
 def update_question(question_id: int, question_data: QuestionCreate, db: Session = Depends(get_db)):
     question = db.query(Question).filter(Question.id == question_id).first()
@@ -244,15 +480,26 @@ def update_question(question_id: int, question_data: QuestionCreate, db: Session
         raise HTTPException(status_code=404, detail="Question not found")
     
     # Check if updated text conflicts with another question
-    existing = db.query(Question).filter(Question.text == question_data.text, Question.id != question_id).first()
+    existing = db.query(Question.id).filter(
+        Question.text_hash == question_text_hash(question_data.text), Question.id != question_id
+    ).first()
     if existing:
         raise HTTPException(status_code=409, detail="Question text already exists")
     
+    key_changed = question.correct_answer != question_data.correct_answer
     for key, value in question_data.dict().items():
         setattr(question, key, value)
     
-    db.commit()
+    try:
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        raise HTTPException(status_code=409, detail="Question text already exists")
     db.refresh(question)
+    question_bank.invalidate()
+    if key_changed:
+        # Answers already stored were graded against the old key
+        apply_regrade(db, lambda db: regrade_question(db, question_id))
     return question
 
 @app.delete("/admin/questions/{question_id}")
@@ -268,29 +515,70 @@ def delete_question(question_id: int, db: Session = Depends(get_db)):
     
     db.delete(question)
     db.commit()
+    question_bank.invalidate()
     return {"message": "Question deleted successfully"}
 
+def stream_results(channel_id: Optional[int], after: Optional[int], limit: Optional[int]):
+    # Uses its own session: the response body outlives the request dependencies
+    db = SessionLocal()
+    try:
+        page = db.query(Participant.id)
+        if channel_id is not None:
+            page = page.filter(Participant.channel_id == channel_id)
+        if after is not None:
+            page = page.filter(Participant.id > after)
+        page = page.order_by(Participant.id)
+        if limit is not None:
+            page = page.limit(limit)
+        page = page.subquery()
+        
+        packed_size = func.coalesce(func.length(Participant.question_ids), 0)
+        rows = db.query(
+            Participant.id, User.username, Channel.name, Participant.score, packed_size,
+            Answer.question_id, Answer.selected_answer, Answer.is_correct
+        ).join(page, page.c.id == Participant.id) \
+         .join(User, User.id == Participant.user_id) \
+         .join(Channel, Channel.id == Participant.channel_id) \
+         .outerjoin(Answer, Answer.participant_id == Participant.id) \
+         .order_by(Participant.id, Answer.id) \
+         .yield_per(1000)
+        
+        yield b"["
+        current = None
+        for participant_id, username, channel, score, packed_size, question_id, selected_answer, is_correct in rows:
+            if current is None or current["participant_id"] != participant_id:
+                if current is not None:
+                    current["total_questions"] = len(current["answers"])
+                    yield json.dumps(current).encode() + b","
+                current = {
+                    "participant_id": participant_id,
+                    "username": username,
+                    "channel": channel,
+                    "score": score,
+                    "total_questions": 0,
+                    "questions_shown": packed_size // 4,
+                    "answers": []
+                }
+            if question_id is not None:
+                current["answers"].append({
+                    "question_id": question_id,
+                    "selected_answer": selected_answer,
+                    "is_correct": is_correct
+                })
+        if current is not None:
+            current["total_questions"] = len(current["answers"])
+            yield json.dumps(current).encode()
+        yield b"]"
+    finally:
+        db.close()
+
 @app.get("/admin/results")
-def get_all_results(db: Session = Depends(get_db)):
-    participants = db.query(Participant).all()
-    results = []
-    for p in participants:
-        answers = db.query(Answer).filter(Answer.participant_id == p.id).all()
-        results.append({
-            "username": p.user.username,
-            "channel": p.channel.name,
-            "score": p.score,
-            "total_questions": len(answers),
-            "answers": [{
-                "question_id": a.question_id,
-                "selected_answer": a.selected_answer,
-                "is_correct": a.is_correct
-            } for a in answers]
-        })
-    return results
+def get_all_results(channel_id: Optional[int] = None, after: Optional[int] = None, limit: Optional[int] = None):
+    # Keyset pagination: pass the last participant_id seen as `after`
+    return StreamingResponse(stream_results(channel_id, after, limit), media_type="application/json")
 
 @app.get("/admin/results/{username}")
-def get_user_detailed_results(username: str, db: Session = Depends(get_db)):
+def get_user_detailed_results(username: str, channel_code: Optional[str] = None, db: Session = Depends(get_db)):
     # URL decode the username
     from urllib.parse import unquote
     decoded_username = unquote(username)
@@ -299,60 +587,151 @@ def get_user_detailed_results(username: str, db: Session = Depends(get_db)):
     if not user:
         raise HTTPException(status_code=404, detail=f"User '{decoded_username}' not found")
     
-    participant = db.query(Participant).filter(Participant.user_id == user.id).first()
-    if not participant:
+    query = db.query(Participant, Channel.name).join(Channel, Channel.id == Participant.channel_id) \
+        .filter(Participant.user_id == user.id)
+    if channel_code is not None:
+        query = query.filter(Channel.code == channel_code)
+    row = query.order_by(Participant.id).first()
+    if not row:
         raise HTTPException(status_code=404, detail="No quiz results found")
-    
-    answers = db.query(Answer).filter(Answer.participant_id == participant.id).all()
-    detailed_answers = []
-    
-    for answer in answers:
-        question = db.query(Question).filter(Question.id == answer.question_id).first()
-        detailed_answers.append({
-            "question_text": question.text,
-            "option_a": question.option_a,
-            "option_b": question.option_b,
-            "option_c": question.option_c,
-            "option_d": question.option_d,
-            "correct_answer": question.correct_answer,
-            "selected_answer": answer.selected_answer,
-            "is_correct": answer.is_correct
-        })
+    participant, channel_name = row
+    
+    rows = db.query(
+        Question.text, Question.option_a, Question.option_b, Question.option_c, Question.option_d,
+        Question.correct_answer, Answer.selected_answer, Answer.is_correct
+    ).join(Question, Question.id == Answer.question_id) \
+     .filter(Answer.participant_id == participant.id) \
+     .order_by(Answer.id).all()
+    
+    detailed_answers = [{
+        "question_text": text,
+        "option_a": option_a,
+        "option_b": option_b,
+        "option_c": option_c,
+        "option_d": option_d,
+        "correct_answer": correct_answer,
+        "selected_answer": selected_answer,
+        "is_correct": is_correct
+    } for text, option_a, option_b, option_c, option_d, correct_answer, selected_answer, is_correct in rows]
     
     return {
         "username": user.username,
-        "channel": participant.channel.name,
+        "channel": channel_name,
         "score": participant.score,
         "total_questions": len(detailed_answers),
         "answers": detailed_answers
     }
 
+# Batch size and pause for background clears, so live quizzes can write between batches
+CLEAR_BATCH_SIZE = int(os.getenv("CLEAR_BATCH_SIZE", "5000"))
+CLEAR_BATCH_PAUSE = float(os.getenv("CLEAR_BATCH_PAUSE", "0.05"))
+
+def delete_in_batches(delete_batch, batch_size=CLEAR_BATCH_SIZE, pause=CLEAR_BATCH_PAUSE):
+    """Run delete_batch(db, batch_size) in short transactions until a batch deletes fewer rows."""
+    deleted = 0
+    while True:
+        db = SessionLocal()
+        try:
+            count = delete_batch(db, batch_size)
+            db.commit()
+        finally:
+            db.close()
+        deleted += count
+        # Lookups between batches may have cached participants that are gone now
+        identity_cache.clear()
+        if count < batch_size:
+            return deleted
+        time.sleep(pause)
+
+def delete_participant_batch(db, batch_size):
+    # Answers go in the same transaction as their participants, so none are orphaned
+    ids = db.scalars(select(Participant.id).order_by(Participant.id).limit(batch_size)).all()
+    if not ids:
+        return 0
+    db.execute(delete(Answer).where(Answer.participant_id.in_(ids)))
+    return db.execute(delete(Participant).where(Participant.id.in_(ids))).rowcount
+
+def delete_channel_batch(db, batch_size):
+    ids = db.scalars(select(Channel.id).order_by(Channel.id).limit(batch_size)).all()
+    if not ids:
+        return 0
+    # Participants who joined during the clear go with their channel
+    participant_ids = select(Participant.id).where(Participant.channel_id.in_(ids))
+    db.execute(delete(Answer).where(Answer.participant_id.in_(participant_ids)))
+    db.execute(delete(Participant).where(Participant.channel_id.in_(ids)))
+    return db.execute(delete(Channel).where(Channel.id.in_(ids))).rowcount
+
+def clear_results_in_batches():
+    # Stop serving cached boards and identities before anything is deleted
+    leaderboards.drop()
+    identity_cache.clear()
+    try:
+        for name, delete_batch in (("participants", delete_participant_batch), ("channels", delete_channel_batch)):
+            deleted = delete_in_batches(delete_batch)
+            logger.info("Cleared %d %s", deleted, name)
+    finally:
+        leaderboards.drop()
+        identity_cache.clear()
+
 @app.delete("/admin/results")
-def clear_all_results(db: Session = Depends(get_db)):
+def clear_all_results(background_tasks: BackgroundTasks, background: bool = False, db: Session = Depends(get_db)):
+    if background:
+        background_tasks.add_task(clear_results_in_batches)
+        return {"message": "Clearing results in the background"}
+    
     # Delete all answers first (foreign key constraint)
-    db.query(Answer).delete()
+    db.execute(delete(Answer))
     # Delete all participants
-    db.query(Participant).delete()
+    db.execute(delete(Participant))
     # Delete all channels
-    db.query(Channel).delete()
+    db.execute(delete(Channel))
     db.commit()
+    leaderboards.drop()
+    identity_cache.clear()
     return {"message": "All results cleared successfully"}
 
+@app.get("/admin/scores/drift")
+def get_score_drift(channel_id: Optional[int] = None, db: Session = Depends(get_db)):
+    return find_score_drift(db, channel_id)
+
+@app.post("/admin/scores/repair")
+def repair_score_drift_now(channel_id: Optional[int] = None):
+    return {"repaired": repair_scores(channel_id)}
+
+@app.get("/admin/cache/identity")
+def get_identity_cache_stats():
+    return identity_cache.stats()
+
 @app.get("/admin/channels")
 def get_all_channels(db: Session = Depends(get_db)):
     channels = db.query(Channel).all()
     return [{"id": c.id, "name": c.name, "code": c.code, "created_at": c.created_at.isoformat()} for c in channels]
 
+@app.post("/admin/channels/{channel_id}/regrade")
+def regrade_channel_answers(channel_id: int, db: Session = Depends(get_db)):
+    if not db.query(Channel.id).filter(Channel.id == channel_id).first():
+        raise HTTPException(status_code=404, detail="Channel not found")
+    changed = apply_regrade(db, lambda db: regrade_channel(db, channel_id), channel_id)
+    return {"message": "Channel regraded", "answers_changed": changed}
+
+@app.get("/admin/channels/{channel_id}/analytics")
+def get_channel_analytics(channel_id: int, db: Session = Depends(get_db)):
+    # Per-question difficulty, discrimination and option counts plus the score histogram
+    if not db.query(Channel.id).filter(Channel.id == channel_id).first():
+        raise HTTPException(status_code=404, detail="Channel not found")
+    return Response(content=channel_analytics.get(db, channel_id), media_type="application/json")
+
 @app.delete("/admin/channels/{channel_id}")
 def delete_channel(channel_id: int, db: Session = Depends(get_db)):
-    # Delete related data first
-    participants = db.query(Participant).filter(Participant.channel_id == channel_id).all()
-    for p in participants:
-        db.query(Answer).filter(Answer.participant_id == p.id).delete()
-    db.query(Participant).filter(Participant.channel_id == channel_id).delete()
+    # Set-based deletes of related data first; ON DELETE CASCADE covers databases that enforce it
+    participant_ids = select(Participant.id).where(Participant.channel_id == channel_id)
+    db.execute(delete(Answer).where(Answer.participant_id.in_(participant_ids)))
+    db.execute(delete(Participant).where(Participant.channel_id == channel_id))
     # Delete channel
-    db.query(Channel).filter(Channel.id == channel_id).delete()
+    db.execute(delete(Channel).where(Channel.id == channel_id))
     db.commit()
+    leaderboards.drop(channel_id)
+    identity_cache.invalidate_channel(channel_id)
     return {"message": "Channel deleted successfully"}
 
 @app.get("/admin/users")
@@ -399,6 +778,8 @@ def delete_admin_user(user_id: int, current_username: str, db: Session = Depends
     if channels_count > 0:
         raise HTTPException(status_code=400, detail="Cannot delete user who has created channels")
     
+    username = user.username
     db.delete(user)
     db.commit()
+    identity_cache.invalidate_user(username)
     return {"message": "User deleted successfully"}
\ No newline at end of file
@@ -0,0 +1,172 @@
+import logging
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+
+from sqlalchemy import event
+
+# Requests slower than this are logged with their SQL statements; 0 disables the log
+SLOW_REQUEST_MS = int(os.getenv("SLOW_REQUEST_MS", "0"))
+SLOW_REQUEST_MAX_STATEMENTS = 50
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+STATEMENT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+
+slow_log = logging.getLogger("quiz.slow")
+
+class RequestStats:
+    __slots__ = ("statements", "sql_seconds", "captured")
+
+    def __init__(self):
+        self.statements = 0
+        self.sql_seconds = 0.0
+        self.captured = [] if SLOW_REQUEST_MS else None
+
+current_request = ContextVar("current_request", default=None)
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.total = 0.0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.total += value
+
+class Metrics:
+    """Per-route request latency and SQL statement metrics in Prometheus text format."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latency = {}
+        self.statements = {}
+        self.sql_seconds = {}
+        self.gauges = []
+
+    def observe(self, method, route, status, seconds, stats):
+        with self._lock:
+            key = (method, route, str(status))
+            if key not in self.latency:
+                self.latency[key] = Histogram(LATENCY_BUCKETS)
+            self.latency[key].observe(seconds)
+            key = (method, route)
+            if key not in self.statements:
+                self.statements[key] = Histogram(STATEMENT_BUCKETS)
+                self.sql_seconds[key] = 0.0
+            self.statements[key].observe(stats.statements)
+            self.sql_seconds[key] += stats.sql_seconds
+
+    def register_gauges(self, collect):
+        """collect() returns [(name, help, value)], read at scrape time."""
+        self.gauges.append(collect)
+
+    def render(self):
+        lines = []
+        with self._lock:
+            render_histogram(lines, "quiz_http_request_duration_seconds", "HTTP request latency by route",
+                             ("method", "route", "status"), self.latency)
+            render_histogram(lines, "quiz_sql_statements_per_request", "SQL statements issued per request",
+                             ("method", "route"), self.statements)
+            lines.append("# HELP quiz_sql_duration_seconds_total Time spent executing SQL by route")
+            lines.append("# TYPE quiz_sql_duration_seconds_total counter")
+            for labels, value in sorted(self.sql_seconds.items()):
+                lines.append(f"quiz_sql_duration_seconds_total{format_labels(('method', 'route'), labels)} {value}")
+        for collect in self.gauges:
+            for name, help_text, value in collect():
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} gauge")
+                lines.append(f"{name} {value}")
+        return "\n".join(lines) + "\n"
+
+def format_labels(names, values, extra=None):
+    pairs = [f'{name}="{escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}"
+
+def escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def render_histogram(lines, name, help_text, label_names, histograms):
+    lines.append(f"# HELP {name} {help_text}")
+    lines.append(f"# TYPE {name} histogram")
+    for labels, histogram in sorted(histograms.items()):
+        cumulative = 0
+        for bound, count in zip(histogram.buckets + ("+Inf",), histogram.counts):
+            cumulative += count
+            le = f'le="{bound}"'
+            lines.append(f"{name}_bucket{format_labels(label_names, labels, le)} {cumulative}")
+        lines.append(f"{name}_sum{format_labels(label_names, labels)} {histogram.total}")
+        lines.append(f"{name}_count{format_labels(label_names, labels)} {cumulative}")
+
+metrics = Metrics()
+
+def instrument_engine(engine):
+    """Count statements and SQL time against the request running on this context."""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if current_request.get() is not None:
+            conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        stats = current_request.get()
+        if stats is None:
+            return
+        elapsed = time.perf_counter() - conn.info["query_start"].pop()
+        stats.statements += 1
+        stats.sql_seconds += elapsed
+        if stats.captured is not None and len(stats.captured) < SLOW_REQUEST_MAX_STATEMENTS:
+            stats.captured.append((elapsed, statement))
+
+class MetricsMiddleware:
+    """ASGI middleware timing each request through the end of its response body."""
+
+    def __init__(self, app):
+        self.app = app
+        self._routes = {}
+
+    def route_template(self, scope):
+        endpoint = scope.get("endpoint")
+        router = scope.get("router")
+        if endpoint is None or router is None:
+            return "unmatched"
+        template = self._routes.get(endpoint)
+        if template is None:
+            template = next((r.path for r in router.routes if getattr(r, "endpoint", None) is endpoint), "unmatched")
+            self._routes[endpoint] = template
+        return template
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        token = current_request.set(stats)
+        status = 500
+        start = time.perf_counter()
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            current_request.reset(token)
+            elapsed = time.perf_counter() - start
+            route = self.route_template(scope)
+            metrics.observe(scope["method"], route, status, elapsed, stats)
+            if SLOW_REQUEST_MS and elapsed * 1000 >= SLOW_REQUEST_MS:
+                slow_log.warning(
+                    "%s %s took %.1f ms with %d SQL statements (%.1f ms in SQL)%s",
+                    scope["method"], route, elapsed * 1000, stats.statements, stats.sql_seconds * 1000,
+                    "".join(f"\n  [{t * 1000:.2f} ms] {sql}" for t, sql in stats.captured)
+                )
@@ -1,49 +1,129 @@
-from database import SessionLocal, User, Base, engine
-from sqlalchemy import text
+from database import SessionLocal, User, Participant, Base, engine, IS_SQLITE, QUESTION_FTS_DDL, question_text_hash
+from sqlalchemy import inspect, text, LargeBinary
 from datetime import datetime
+from quiz_timer import deadline_for
+
+INDEXES = [
+    "CREATE UNIQUE INDEX IF NOT EXISTS ix_participants_user_channel ON participants (user_id, channel_id)",
+    "CREATE UNIQUE INDEX IF NOT EXISTS ix_answers_participant_question ON answers (participant_id, question_id)",
+    "CREATE INDEX IF NOT EXISTS ix_answers_question_id ON answers (question_id)",
+    "CREATE UNIQUE INDEX IF NOT EXISTS ix_questions_text_hash ON questions (text_hash)",
+    "CREATE INDEX IF NOT EXISTS ix_participants_deadline_at ON participants (deadline_at)",
+]
+
+def column_exists(table, column):
+    return any(c["name"] == column for c in inspect(engine).get_columns(table))
 
 def migrate_database():
     """Migration script to add new columns to existing database"""
     db = SessionLocal()
-    
+
     try:
         # Add password column to users table if it doesn't exist
-        try:
+        if column_exists("users", "password"):
+            print("Password column already exists")
+        else:
             db.execute(text("ALTER TABLE users ADD COLUMN password VARCHAR DEFAULT 'admin123'"))
             print("Added password column to users table")
-        except Exception as e:
-            if "duplicate column name" in str(e).lower() or "already exists" in str(e).lower():
-                print("Password column already exists")
-            else:
-                print(f"Error adding password column: {e}")
-        
+
         # Add created_at column to users table (SQLite doesn't support CURRENT_TIMESTAMP as default in ALTER)
-        try:
-            db.execute(text("ALTER TABLE users ADD COLUMN created_at DATETIME"))
+        if column_exists("users", "created_at"):
+            print("Created_at column already exists")
+        else:
+            db.execute(text("ALTER TABLE users ADD COLUMN created_at TIMESTAMP"))
             print("Added created_at column to users table")
-            
+
             # Update existing records with current timestamp
-            db.execute(text("UPDATE users SET created_at = datetime('now') WHERE created_at IS NULL"))
+            db.execute(text("UPDATE users SET created_at = :now WHERE created_at IS NULL"), {"now": datetime.utcnow()})
             print("Updated existing users with current timestamp")
-            
-        except Exception as e:
-            if "duplicate column name" in str(e).lower() or "already exists" in str(e).lower():
-                print("Created_at column already exists")
-            else:
-                print(f"Error adding created_at column: {e}")
-        
+
+        # Add question_ids column to participants table (per-participant question set)
+        if column_exists("participants", "question_ids"):
+            print("Question_ids column already exists")
+        else:
+            column_type = LargeBinary().compile(dialect=engine.dialect)
+            db.execute(text(f"ALTER TABLE participants ADD COLUMN question_ids {column_type}"))
+            print("Added question_ids column to participants table")
+
+        # Add text_hash column to questions table (normalised-text duplicate check)
+        if column_exists("questions", "text_hash"):
+            print("Text_hash column already exists")
+        else:
+            db.execute(text("ALTER TABLE questions ADD COLUMN text_hash VARCHAR(64)"))
+            print("Added text_hash column to questions table")
+
+        # Existing near-identical questions keep a NULL hash so the unique index can be built
+        seen = {h for (h,) in db.execute(text("SELECT text_hash FROM questions WHERE text_hash IS NOT NULL"))}
+        updates = []
+        duplicates = []
+        for question_id, question_text in db.execute(text("SELECT id, text FROM questions WHERE text_hash IS NULL ORDER BY id")):
+            text_hash = question_text_hash(question_text or "")
+            if text_hash in seen:
+                duplicates.append(question_id)
+                continue
+            seen.add(text_hash)
+            updates.append({"id": question_id, "text_hash": text_hash})
+        if updates:
+            db.execute(text("UPDATE questions SET text_hash = :text_hash WHERE id = :id"), updates)
+            print(f"Hashed {len(updates)} question texts")
+        if duplicates:
+            print(f"Questions duplicating an earlier question's text (left unhashed): {duplicates}")
+
+        # Add duration_minutes to channels and deadline_at to participants (server-side quiz timer)
+        if column_exists("channels", "duration_minutes"):
+            print("Duration_minutes column already exists")
+        else:
+            db.execute(text("ALTER TABLE channels ADD COLUMN duration_minutes INTEGER"))
+            print("Added duration_minutes column to channels table")
+
+        if column_exists("participants", "deadline_at"):
+            print("Deadline_at column already exists")
+        else:
+            db.execute(text("ALTER TABLE participants ADD COLUMN deadline_at TIMESTAMP"))
+            print("Added deadline_at column to participants table")
+
+        # Participants who joined before deadlines existed get the default quiz length from their start time
+        updates = [
+            {"id": participant_id, "deadline_at": deadline_for(started_at, None)}
+            for participant_id, started_at in db.query(Participant.id, Participant.quiz_started_at)
+            .filter(Participant.deadline_at.is_(None), Participant.quiz_started_at.isnot(None))
+        ]
+        if updates:
+            db.execute(text("UPDATE participants SET deadline_at = :deadline_at WHERE id = :id"), updates)
+            print(f"Set deadlines for {len(updates)} existing participants")
+
+        # Full-text index for admin search (SQLite FTS5)
+        if IS_SQLITE and not inspect(engine).has_table("questions_fts"):
+            for statement in QUESTION_FTS_DDL:
+                db.execute(text(statement))
+            db.execute(text("INSERT INTO questions_fts(questions_fts) VALUES ('rebuild')"))
+            print("Created and filled questions_fts index")
+
         # Update existing admin user with password if exists
-        try:
-            admin_user = db.query(User).filter(User.username == "admin").first()
-            if admin_user and not admin_user.password:
-                admin_user.password = "admin123"
-                print("Updated admin user with default password")
-        except Exception as e:
-            print(f"Error updating admin user: {e}")
-        
+        admin_user = db.query(User).filter(User.username == "admin").first()
+        if admin_user and not admin_user.password:
+            admin_user.password = "admin123"
+            print("Updated admin user with default password")
+
+        # Drop duplicates that would violate the new unique indexes
+        duplicate_participants = "SELECT id FROM participants WHERE id NOT IN (SELECT MIN(id) FROM participants GROUP BY user_id, channel_id)"
+        db.execute(text(f"DELETE FROM answers WHERE participant_id IN ({duplicate_participants})"))
+        removed = db.execute(text(f"DELETE FROM participants WHERE id IN ({duplicate_participants})")).rowcount
+        if removed:
+            print(f"Removed {removed} duplicate participants")
+        removed = db.execute(text(
+            "DELETE FROM answers WHERE id NOT IN (SELECT MAX(id) FROM answers GROUP BY participant_id, question_id)"
+        )).rowcount
+        if removed:
+            print(f"Removed {removed} duplicate answers")
+
+        for statement in INDEXES:
+            db.execute(text(statement))
+        print("Ensured participant, answer and question indexes")
+
         db.commit()
         print("Migration completed successfully!")
-        
+
     except Exception as e:
         db.rollback()
         print(f"Migration failed: {e}")
@@ -51,4 +131,4 @@ def migrate_database():
         db.close()
 
 if __name__ == "__main__":
-    migrate_database()
\ No newline at end of file
+    migrate_database()
@@ -0,0 +1,118 @@
+import json
+import os
+import random
+import struct
+import threading
+from typing import NamedTuple, Tuple
+
+from database import Question
+from shared_state import shared_state
+
+# Questions drawn for each participant when they join a channel
+QUIZ_QUESTION_COUNT = int(os.getenv("QUIZ_QUESTION_COUNT", "70"))
+
+QUESTION_FIELDS = ("id", "text", "option_a", "option_b", "option_c", "option_d", "correct_answer")
+
+class QuestionRecord(NamedTuple):
+    id: int
+    text: str
+    option_a: str
+    option_b: str
+    option_c: str
+    option_d: str
+    correct_answer: str
+    payload: bytes
+
+class QuestionBank:
+    """In-process snapshot of the questions table.
+
+    Records are immutable and carry their JSON encoding, so serving a random
+    draw is a sample over a tuple plus a byte join. Writers call invalidate()
+    to bump the version; the next reader reloads the snapshot.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._version = 0
+        self._loaded_version = -1
+        self._records: Tuple[QuestionRecord, ...] = ()
+        self._by_id = {}
+
+    @property
+    def version(self):
+        return self._version
+
+    def invalidate(self):
+        """Mark the snapshot stale in every worker."""
+        shared_state.broadcast("questions.invalidate")
+
+    def _invalidate_local(self, data=None):
+        with self._lock:
+            self._version += 1
+
+    def _load(self, db):
+        with self._lock:
+            if self._loaded_version == self._version:
+                return
+            version = self._version
+            rows = db.query(*[getattr(Question, f) for f in QUESTION_FIELDS]).order_by(Question.id).all()
+            records = tuple(
+                QuestionRecord(*row, payload=json.dumps(dict(zip(QUESTION_FIELDS, row)), separators=(",", ":")).encode())
+                for row in rows
+            )
+            self._records = records
+            self._by_id = {r.id: r for r in records}
+            self._loaded_version = version
+
+    def records(self, db):
+        if self._loaded_version != self._version:
+            self._load(db)
+        return self._records
+
+    def cached_records(self):
+        """The snapshot if it is current, without touching the database; otherwise None."""
+        if self._loaded_version != self._version:
+            return None
+        return self._records
+
+    def get(self, db, question_id):
+        if self._loaded_version != self._version:
+            self._load(db)
+        return self._by_id.get(question_id)
+
+    def sample(self, db, count):
+        records = self.records(db)
+        if len(records) <= count:
+            return records
+        return random.sample(records, count)
+
+    def draw_ids(self, db, seed, count=QUIZ_QUESTION_COUNT):
+        return draw_ids_from(self.records(db), seed, count)
+
+    def select(self, db, question_ids):
+        """Records for the given ids in order, skipping questions deleted since."""
+        if self._loaded_version != self._version:
+            self._load(db)
+        by_id = self._by_id
+        return [by_id[qid] for qid in question_ids if qid in by_id]
+
+def draw_ids_from(records, seed, count=QUIZ_QUESTION_COUNT):
+    # Seeded so a participant's draw is reproducible
+    if len(records) > count:
+        records = random.Random(seed).sample(records, count)
+    return [r.id for r in records]
+
+def pack_question_ids(question_ids):
+    return struct.pack(f"<{len(question_ids)}I", *question_ids)
+
+def unpack_question_ids(data):
+    if not data:
+        return ()
+    return struct.unpack(f"<{len(data) // 4}I", data)
+
+def to_json(records):
+    return b"[" + b",".join(r.payload for r in records) + b"]"
+
+question_bank = QuestionBank()
+shared_state.on("questions.invalidate", question_bank._invalidate_local)
+shared_state.on_resync(question_bank._invalidate_local)
@@ -0,0 +1,184 @@
+"""Bulk question import and export as CSV or JSONL.
+
+Imports stream the input row by row, skip texts already in the bank (or
+earlier in the same file) and insert the rest in batches; every rejected
+row is reported with its line number. Exports stream straight from the
+database.
+
+    python question_io.py import questions.csv
+    python question_io.py export --format jsonl > questions.jsonl
+"""
+import argparse
+import csv
+import io
+import json
+import sys
+
+from sqlalchemy import insert
+
+from database import SessionLocal, Question, question_text_hash
+from question_bank import question_bank
+
+IMPORT_FIELDS = ("text", "option_a", "option_b", "option_c", "option_d", "correct_answer")
+EXPORT_FIELDS = ("id",) + IMPORT_FIELDS
+FORMATS = ("csv", "jsonl")
+IMPORT_BATCH_SIZE = 1000
+# Rejected rows listed in the report; the total is always counted
+MAX_REPORTED_ERRORS = 1000
+
+def detect_format(filename, content_type=None):
+    if filename:
+        extension = filename.rsplit(".", 1)[-1].lower()
+        if extension in ("jsonl", "ndjson"):
+            return "jsonl"
+        if extension == "csv":
+            return "csv"
+    if content_type and ("ndjson" in content_type or "jsonl" in content_type):
+        return "jsonl"
+    return "csv"
+
+def read_csv(text_stream):
+    """Yield (line, row) with line the file line the row starts on."""
+    reader = csv.DictReader(text_stream)
+    line = reader.line_num + 1
+    for row in reader:
+        yield line, row
+        line = reader.line_num + 1
+
+def read_jsonl(text_stream):
+    for line, raw in enumerate(text_stream, start=1):
+        if not raw.strip():
+            continue
+        try:
+            yield line, json.loads(raw)
+        except ValueError as e:
+            yield line, ValueError(f"Invalid JSON: {e}")
+
+READERS = {"csv": read_csv, "jsonl": read_jsonl}
+
+def clean_row(row):
+    """Return (values, error) for one parsed input row."""
+    if isinstance(row, Exception):
+        return None, str(row)
+    if not isinstance(row, dict):
+        return None, "Expected an object"
+    values = {}
+    for field in IMPORT_FIELDS:
+        value = row.get(field)
+        if not isinstance(value, str) or not value.strip():
+            return None, f"Missing {field}"
+        values[field] = value.strip()
+    values["correct_answer"] = values["correct_answer"].upper()
+    if values["correct_answer"] not in ("A", "B", "C", "D"):
+        return None, "correct_answer must be one of A, B, C, D"
+    return values, None
+
+class QuestionImport:
+    """Validates, dedupes and batch-inserts rows; commit() ends the import."""
+
+    def __init__(self, db, batch_size=IMPORT_BATCH_SIZE):
+        self.db = db
+        self.batch_size = batch_size
+        # Normalised-text hashes, so case and whitespace variants count as duplicates
+        self.seen = {text_hash for (text_hash,) in db.query(Question.text_hash)}
+        self.pending = []
+        self.inserted = 0
+        self.duplicates = 0
+        self.error_count = 0
+        self.errors = []
+
+    def add(self, line, row):
+        values, error = clean_row(row)
+        if error:
+            self.error_count += 1
+            if len(self.errors) < MAX_REPORTED_ERRORS:
+                self.errors.append({"line": line, "error": error})
+            return
+        values["text_hash"] = question_text_hash(values["text"])
+        if values["text_hash"] in self.seen:
+            self.duplicates += 1
+            return
+        self.seen.add(values["text_hash"])
+        self.pending.append(values)
+        if len(self.pending) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if self.pending:
+            self.db.execute(insert(Question), self.pending)
+            self.inserted += len(self.pending)
+            self.pending = []
+
+    def commit(self):
+        self.flush()
+        self.db.commit()
+        if self.inserted:
+            # Reaches running servers from a CLI import only through SHARED_STATE_URL
+            question_bank.invalidate()
+        return {
+            "inserted": self.inserted,
+            "duplicates": self.duplicates,
+            "errors": self.error_count,
+            "error_rows": self.errors
+        }
+
+def import_questions(db, text_stream, fmt="csv", batch_size=IMPORT_BATCH_SIZE):
+    """Import questions from an iterable of text lines (an open file works); returns the import report."""
+    if fmt not in READERS:
+        raise ValueError(f"Unsupported format: {fmt}")
+    job = QuestionImport(db, batch_size)
+    try:
+        for line, row in READERS[fmt](text_stream):
+            job.add(line, row)
+    except csv.Error as e:
+        db.rollback()
+        raise ValueError(f"Invalid CSV: {e}")
+    return job.commit()
+
+def export_questions(db, fmt="csv", batch_size=IMPORT_BATCH_SIZE):
+    """Yield the question bank as CSV or JSONL text chunks."""
+    rows = db.query(*[getattr(Question, f) for f in EXPORT_FIELDS]).order_by(Question.id).yield_per(batch_size)
+    buffer = io.StringIO()
+    if fmt == "csv":
+        writer = csv.writer(buffer)
+        writer.writerow(EXPORT_FIELDS)
+    for count, row in enumerate(rows, start=1):
+        if fmt == "csv":
+            writer.writerow(row)
+        else:
+            buffer.write(json.dumps(dict(zip(EXPORT_FIELDS, row))) + "\n")
+        if count % batch_size == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bulk import or export quiz questions")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    import_parser = subparsers.add_parser("import")
+    import_parser.add_argument("path", help="CSV or JSONL file, - for stdin")
+    import_parser.add_argument("--format", choices=FORMATS)
+    import_parser.add_argument("--batch-size", type=int, default=IMPORT_BATCH_SIZE)
+    export_parser = subparsers.add_parser("export")
+    export_parser.add_argument("--format", choices=FORMATS, default="csv")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        if args.command == "import":
+            fmt = args.format or detect_format(args.path)
+            if args.path == "-":
+                report = import_questions(db, sys.stdin, fmt, args.batch_size)
+            else:
+                with open(args.path, newline="", encoding="utf-8") as f:
+                    report = import_questions(db, f, fmt, args.batch_size)
+            for error in report["error_rows"]:
+                print(f"line {error['line']}: {error['error']}", file=sys.stderr)
+            print(f"{report['inserted']} questions imported, {report['duplicates']} duplicates skipped, "
+                  f"{report['errors']} rows rejected")
+        else:
+            for chunk in export_questions(db, args.format):
+                sys.stdout.write(chunk)
+    finally:
+        db.close()
@@ -0,0 +1,120 @@
+import gzip
+import hashlib
+import os
+import threading
+from typing import NamedTuple, Optional
+
+from fastapi import Request, Response
+
+from question_bank import question_bank, to_json
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# How long nginx may serve the pack from its own cache before revalidating
+QUESTION_PACK_PROXY_TTL = int(os.getenv("QUESTION_PACK_PROXY_TTL", "30"))
+
+class QuestionPack(NamedTuple):
+    version: int
+    # Content hash; each encoding's strong ETag is derived from it
+    digest: str
+    identity: bytes
+    gzip: bytes
+    br: Optional[bytes]
+
+def build_pack(version, records):
+    body = to_json(records)
+    return QuestionPack(
+        version=version,
+        digest=hashlib.sha256(body).hexdigest()[:32],
+        identity=body,
+        gzip=gzip.compress(body, compresslevel=9, mtime=0),
+        br=brotli.compress(body) if brotli is not None else None
+    )
+
+class QuestionPackCache:
+    """The serialised, pre-compressed question bank, rebuilt when the bank version changes."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pack = None
+
+    def get(self, db):
+        pack = self._pack
+        if pack is not None and pack.version == question_bank.version:
+            return pack
+        with self._lock:
+            version = question_bank.version
+            if self._pack is None or self._pack.version != version:
+                self._pack = build_pack(version, question_bank.records(db))
+            return self._pack
+
+# Tag suffix per content-coding: each encoded body is its own representation
+ETAG_SUFFIXES = {"identity": "", "gzip": "-gz", "br": "-br"}
+
+def pack_etag(pack, encoding):
+    return '"' + pack.digest + ETAG_SUFFIXES[encoding] + '"'
+
+def etag_matches(if_none_match, etags):
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        # If-None-Match uses weak comparison
+        if tag.startswith("W/"):
+            tag = tag[2:]
+        if tag in etags:
+            return True
+    return False
+
+def encoding_weights(accept_encoding):
+    """{content-coding: q} from an Accept-Encoding header."""
+    weights = {}
+    for part in accept_encoding.split(","):
+        coding, *params = [item.strip() for item in part.split(";")]
+        if not coding:
+            continue
+        q = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        weights[coding.lower()] = q
+    return weights
+
+def choose_encoding(accept_encoding, has_br):
+    weights = encoding_weights(accept_encoding)
+    default = weights.get("*", 0.0)
+    candidates = ["br", "gzip"] if has_br else ["gzip"]
+    # Highest q wins; ties go to the smaller body
+    best = max(candidates, key=lambda coding: weights.get(coding, default))
+    return best if weights.get(best, default) > 0 else "identity"
+
+def pack_response(request: Request, pack: QuestionPack):
+    encoding = choose_encoding(request.headers.get("accept-encoding", ""), pack.br is not None)
+    headers = {
+        "ETag": pack_etag(pack, encoding),
+        # Browsers revalidate every time; nginx answers those from its cache
+        "Cache-Control": "public, no-cache",
+        "X-Accel-Expires": str(QUESTION_PACK_PROXY_TTL),
+        "Vary": "Accept-Encoding",
+    }
+    # A client holding any encoding of the current pack is up to date
+    etags = [pack_etag(pack, coding) for coding in ETAG_SUFFIXES]
+    if etag_matches(request.headers.get("if-none-match"), etags):
+        return Response(status_code=304, headers=headers)
+
+    if encoding == "identity":
+        body = pack.identity
+    else:
+        body, headers["Content-Encoding"] = getattr(pack, encoding), encoding
+    return Response(content=body, media_type="application/json", headers=headers)
+
+question_packs = QuestionPackCache()
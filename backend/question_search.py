@@ -0,0 +1,90 @@
+import re
+
+from sqlalchemy import inspect, text
+
+from database import normalize_question_text
+from question_bank import question_bank
+
+# Minimum word overlap (Jaccard) for a question to count as a near-duplicate
+SIMILARITY_THRESHOLD = 0.7
+SIMILAR_CANDIDATES = 50
+MAX_QUERY_TERMS = 32
+
+def words(value):
+    return re.findall(r"\w+", normalize_question_text(value))
+
+def terms(value):
+    """Words of a user query, capped so a huge query can't build a huge MATCH."""
+    return words(value)[:MAX_QUERY_TERMS]
+
+def fts_query(query_terms, operator):
+    # Quoted so user input is never parsed as FTS5 syntax
+    return f" {operator} ".join(f'"{term}"' for term in query_terms)
+
+def similarity(a, b):
+    a, b = set(a), set(b)
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+class QuestionSearch:
+    """Admin search and near-duplicate lookup over the question bank.
+
+    Uses the questions_fts index on SQLite and falls back to scanning the
+    in-memory question bank where it doesn't exist (PostgreSQL, or a
+    database that hasn't been migrated).
+    """
+
+    def __init__(self):
+        self._fts = None
+
+    def has_fts(self, db):
+        if self._fts is None:
+            bind = db.get_bind()
+            self._fts = bind.dialect.name == "sqlite" and inspect(bind).has_table("questions_fts")
+        return self._fts
+
+    def _match(self, db, query, limit):
+        rows = db.execute(
+            text("SELECT rowid FROM questions_fts WHERE questions_fts MATCH :query ORDER BY rank LIMIT :limit"),
+            {"query": query, "limit": limit}
+        )
+        return question_bank.select(db, [row[0] for row in rows])
+
+    def search(self, db, query, limit=20):
+        """Questions containing every word of query, ranked by bm25 when the FTS index exists."""
+        query_terms = terms(query)
+        if not query_terms:
+            return []
+        if self.has_fts(db):
+            return self._match(db, fts_query(query_terms, "AND"), limit)
+        wanted = set(query_terms)
+        matches = []
+        for record in question_bank.records(db):
+            fields = " ".join((record.text, record.option_a, record.option_b, record.option_c, record.option_d))
+            if wanted.issubset(words(fields)):
+                matches.append(record)
+                if len(matches) >= limit:
+                    break
+        return matches
+
+    def similar(self, db, question_text, limit=5, exclude_id=None):
+        """Questions whose text shares most of its words with question_text."""
+        query_terms = terms(question_text)
+        if not query_terms:
+            return []
+        if self.has_fts(db):
+            candidates = self._match(db, "text : (" + fts_query(query_terms, "OR") + ")", SIMILAR_CANDIDATES)
+        else:
+            candidates = question_bank.records(db)
+        scored = []
+        for record in candidates:
+            if record.id == exclude_id:
+                continue
+            score = similarity(query_terms, words(record.text))
+            if score >= SIMILARITY_THRESHOLD:
+                scored.append({"id": record.id, "text": record.text, "similarity": round(score, 3)})
+        scored.sort(key=lambda item: -item["similarity"])
+        return scored[:limit]
+
+question_search = QuestionSearch()
@@ -0,0 +1,48 @@
+import os
+from datetime import datetime, timedelta
+
+from fastapi import HTTPException
+from sqlalchemy import select, update
+
+from database import Channel, Participant, User
+
+# Default quiz length for channels created without one
+QUIZ_DURATION_MINUTES = int(os.getenv("QUIZ_DURATION_MINUTES", "70"))
+# Answers arriving this long after the deadline are still accepted (network latency, the client's final submit)
+QUIZ_DEADLINE_GRACE_SECONDS = int(os.getenv("QUIZ_DEADLINE_GRACE_SECONDS", "30"))
+# Seconds between sweeps that auto-submit expired participants; 0 disables the sweep
+DEADLINE_SWEEP_INTERVAL = int(os.getenv("DEADLINE_SWEEP_INTERVAL", "15"))
+DEADLINE_SWEEP_BATCH_SIZE = int(os.getenv("DEADLINE_SWEEP_BATCH_SIZE", "500"))
+
+def deadline_for(started_at, duration_minutes):
+    return started_at + timedelta(minutes=duration_minutes or QUIZ_DURATION_MINUTES)
+
+def seconds_remaining(deadline_at, now=None):
+    if deadline_at is None:
+        return None
+    return max(0, int((deadline_at - (now or datetime.utcnow())).total_seconds()))
+
+def check_deadline(deadline_at):
+    """Reject answers once the participant's deadline (plus grace) has passed."""
+    if deadline_at is not None and datetime.utcnow() > deadline_at + timedelta(seconds=QUIZ_DEADLINE_GRACE_SECONDS):
+        raise HTTPException(status_code=403, detail="Time is up for this quiz")
+
+def expired_participants(now, limit):
+    cutoff = now - timedelta(seconds=QUIZ_DEADLINE_GRACE_SECONDS)
+    return select(Participant.id, Participant.channel_id, Participant.score, User.username, Channel.code) \
+        .join(User, User.id == Participant.user_id) \
+        .join(Channel, Channel.id == Participant.channel_id) \
+        .where(Participant.quiz_submitted == False, Participant.deadline_at < cutoff) \
+        .order_by(Participant.deadline_at) \
+        .limit(limit)
+
+def submit_expired(db, limit=DEADLINE_SWEEP_BATCH_SIZE):
+    """Auto-submit one batch of expired participants; returns the rows submitted."""
+    rows = db.execute(expired_participants(datetime.utcnow(), limit)).all()
+    if rows:
+        db.execute(
+            update(Participant).where(Participant.id.in_([row.id for row in rows]), Participant.quiz_submitted == False)
+            .values(quiz_submitted=True).execution_options(synchronize_session=False)
+        )
+        db.commit()
+    return rows
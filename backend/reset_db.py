@@ -1,10 +1,14 @@
-from database import Base, engine
+from database import Base, engine, IS_SQLITE
 import os
 
 # Remove existing database
-if os.path.exists("quiz.db"):
-    os.remove("quiz.db")
+if IS_SQLITE:
+    for path in ("quiz.db", "quiz.db-wal", "quiz.db-shm"):
+        if os.path.exists(path):
+            os.remove(path)
+else:
+    Base.metadata.drop_all(bind=engine)
 
 # Create new database with updated schema
 Base.metadata.create_all(bind=engine)
-print("Database reset with new schema!")
\ No newline at end of file
+print("Database reset with new schema!")
@@ -0,0 +1,48 @@
+from pydantic import BaseModel
+from typing import Literal, Optional
+
+AnswerOption = Literal["A", "B", "C", "D"]
+
+class UserCreate(BaseModel):
+    username: str
+    is_admin: bool = False
+
+class ChannelCreate(BaseModel):
+    name: str
+    duration_minutes: Optional[int] = None
+
+class JoinChannel(BaseModel):
+    code: str
+    username: str
+
+class SubmitAnswer(BaseModel):
+    question_id: int
+    selected_answer: AnswerOption
+
+class AdminLogin(BaseModel):
+    username: str
+    password: str
+
+class QuestionCreate(BaseModel):
+    text: str
+    option_a: str
+    option_b: str
+    option_c: str
+    option_d: str
+    correct_answer: AnswerOption
+
+class QuestionUpdate(BaseModel):
+    text: str
+    option_a: str
+    option_b: str
+    option_c: str
+    option_d: str
+    correct_answer: AnswerOption
+
+class UserCreateAdmin(BaseModel):
+    username: str
+    password: str
+
+class PasswordUpdate(BaseModel):
+    current_password: str
+    new_password: str
@@ -0,0 +1,110 @@
+from sqlalchemy import and_, func, select, update
+from database import Participant, Answer, Question, answer_upsert
+
+def lock_participant(participant_id):
+    # A no-op write takes the participant row lock (PostgreSQL) or the write
+    # lock (SQLite), so reads that follow see every committed answer
+    return update(Participant).where(Participant.id == participant_id) \
+        .values(score=Participant.score).execution_options(synchronize_session=False)
+
+def previous_answers(participant_id, question_ids):
+    return select(Answer.question_id, Answer.is_correct).where(
+        Answer.participant_id == participant_id,
+        Answer.question_id.in_(question_ids)
+    )
+
+def add_to_score(participant_id, delta):
+    return update(Participant).where(Participant.id == participant_id) \
+        .values(score=Participant.score + delta).execution_options(synchronize_session=False)
+
+def current_score(participant_id):
+    return select(Participant.score).where(Participant.id == participant_id)
+
+def mark_submitted(participant_id):
+    return update(Participant).where(Participant.id == participant_id) \
+        .values(quiz_submitted=True).execution_options(synchronize_session=False)
+
+def grade_rows(participant_id, graded, previous):
+    """Build answer rows and the score delta for {question_id: (selected, is_correct)}."""
+    rows = []
+    delta = 0
+    for question_id, (selected_answer, is_correct) in graded.items():
+        delta += int(is_correct) - int(bool(previous.get(question_id)))
+        rows.append({
+            "participant_id": participant_id,
+            "question_id": question_id,
+            "selected_answer": selected_answer,
+            "is_correct": is_correct
+        })
+    return rows, delta
+
+def apply_answers(db, participant_id, graded):
+    """Upsert graded answers and adjust the score by the change in correct answers.
+
+    Returns the participant's new score. The caller commits.
+    """
+    db.execute(lock_participant(participant_id))
+    previous = dict(db.execute(previous_answers(participant_id, list(graded))).all())
+    rows, delta = grade_rows(participant_id, graded, previous)
+    db.execute(answer_upsert(rows))
+    if delta:
+        db.execute(add_to_score(participant_id, delta))
+    return db.execute(current_score(participant_id)).scalar()
+
+def correct_count():
+    return select(func.count(Answer.id)).where(
+        Answer.participant_id == Participant.id,
+        Answer.is_correct == True
+    ).scalar_subquery()
+
+def find_score_drift(db, channel_id=None):
+    """Participants whose stored score differs from their correct answer count."""
+    actual = correct_count()
+    query = select(Participant.id, Participant.score, actual).where(func.coalesce(Participant.score, -1) != actual)
+    if channel_id is not None:
+        query = query.where(Participant.channel_id == channel_id)
+    return [
+        {"participant_id": participant_id, "score": score, "correct_answers": correct}
+        for participant_id, score, correct in db.execute(query).all()
+    ]
+
+def repair_score_drift(db, channel_id=None):
+    """Reset drifted scores to the correct answer count in one statement; returns rows fixed."""
+    actual = correct_count()
+    condition = func.coalesce(Participant.score, -1) != actual
+    if channel_id is not None:
+        condition = and_(condition, Participant.channel_id == channel_id)
+    result = db.execute(
+        update(Participant).where(condition).values(score=actual).execution_options(synchronize_session=False)
+    )
+    db.commit()
+    return result.rowcount
+
+def regrade_answers(db, answer_filter, participant_filter):
+    """Re-grade matching answers against the current key and recount affected scores.
+
+    Returns the number of answers whose correctness changed. The caller commits.
+    """
+    key = select(Question.correct_answer).where(Question.id == Answer.question_id).scalar_subquery()
+    # A missing key is false rather than NULL, as the in-memory grader has it
+    regraded = func.coalesce(Answer.selected_answer == key, False)
+    changed = db.execute(
+        update(Answer).where(answer_filter, Answer.is_correct.is_distinct_from(regraded))
+        .values(is_correct=regraded).execution_options(synchronize_session=False)
+    ).rowcount
+    if changed:
+        db.execute(
+            update(Participant).where(participant_filter).values(score=correct_count())
+            .execution_options(synchronize_session=False)
+        )
+    return changed
+
+def regrade_question(db, question_id):
+    """Re-grade every stored answer to one question, e.g. after its key was corrected."""
+    answered = select(Answer.participant_id).where(Answer.question_id == question_id)
+    return regrade_answers(db, Answer.question_id == question_id, Participant.id.in_(answered))
+
+def regrade_channel(db, channel_id):
+    """Re-grade every stored answer in a channel."""
+    participants = select(Participant.id).where(Participant.channel_id == channel_id)
+    return regrade_answers(db, Answer.participant_id.in_(participants), Participant.channel_id == channel_id)
@@ -1,11 +1,9 @@
-from database import SessionLocal, Question
+from database import SessionLocal
+from question_io import QuestionImport
 
 def seed_aws_questions():
     db = SessionLocal()
     
-    # Clear existing questions first
-    db.query(Question).delete()
-    
     questions = [
         {
             "text": "What does AWS stand for?",
@@ -545,13 +543,13 @@ def seed_aws_questions():
         }
     ]
     
-    for q_data in questions:
-        question = Question(**q_data)
-        db.add(question)
-    
-    db.commit()
+    # Questions already in the bank are skipped, so existing answers keep their question ids
+    job = QuestionImport(db)
+    for line, q_data in enumerate(questions, start=1):
+        job.add(line, q_data)
+    report = job.commit()
     db.close()
-    print("70 unique AWS questions seeded successfully!")
+    print(f"{report['inserted']} AWS questions seeded, {report['duplicates']} already present")
 
 if __name__ == "__main__":
     seed_aws_questions()
\ No newline at end of file
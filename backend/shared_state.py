@@ -0,0 +1,177 @@
+"""State shared between app workers.
+
+In-process caches (question bank, identity cache, leaderboards) and the live
+feed stay local to each worker for fast reads; their writes go through
+broadcast(), which applies the change here and publishes it to every other
+worker. SHARED_STATE_URL picks the backend:
+
+    (unset)          single process, nothing leaves the process
+    redis://host/0   Redis pub/sub, for uvicorn --workers / gunicorn
+    fakeredis://     in-process fakeredis, for trying the Redis path locally
+"""
+import json
+import logging
+import os
+import queue
+import threading
+import time
+import uuid
+
+SHARED_STATE_URL = os.getenv("SHARED_STATE_URL", "")
+SHARED_STATE_CHANNEL = os.getenv("SHARED_STATE_CHANNEL", "quiz:events")
+
+logger = logging.getLogger("quiz.shared")
+
+class MemoryState:
+    """Single-process backend: broadcasts only reach this process."""
+
+    multi_worker = False
+
+    def __init__(self):
+        self.worker_id = uuid.uuid4().hex
+        self._handlers = {}
+        self._resync_handlers = []
+        self._lock = threading.Lock()
+        self._leases = {}
+
+    def on(self, kind, handler):
+        """Call handler(data) for every broadcast of kind, local or from another worker."""
+        self._handlers.setdefault(kind, []).append(handler)
+
+    def on_resync(self, handler):
+        """Call handler() when broadcasts may have been missed and local state must be rebuilt."""
+        self._resync_handlers.append(handler)
+
+    def broadcast(self, kind, **data):
+        self._dispatch(kind, data)
+        self._publish(kind, data)
+
+    def _dispatch(self, kind, data):
+        for handler in self._handlers.get(kind, ()):
+            try:
+                handler(data)
+            except Exception:
+                logger.exception("Shared state handler for %s failed", kind)
+
+    def _resync(self):
+        for handler in self._resync_handlers:
+            handler()
+
+    def _publish(self, kind, data):
+        pass
+
+    def acquire(self, name, ttl):
+        """Take a named lease for ttl seconds; True if no other worker holds it."""
+        with self._lock:
+            now = time.monotonic()
+            if self._leases.get(name, 0) > now:
+                return False
+            self._leases[name] = now + ttl
+            return True
+
+    def start(self):
+        pass
+
+    def stop(self):
+        pass
+
+class RedisState(MemoryState):
+    """Redis pub/sub backend; any Redis-protocol server (or fakeredis) works."""
+
+    multi_worker = True
+
+    def __init__(self, client):
+        super().__init__()
+        self.client = client
+        self._pubsub = None
+        self._thread = None
+        self._publisher = None
+        self._outbox = queue.Queue()
+        self._stopping = threading.Event()
+        self._subscribed = threading.Event()
+
+    def _publish(self, kind, data):
+        message = json.dumps({"origin": self.worker_id, "kind": kind, "data": data}, separators=(",", ":"))
+        if self._publisher is None:
+            # Not serving (CLI imports, seeding): send before returning
+            self._send(kind, message)
+        else:
+            # Async routes broadcast on the event loop; a thread does the network I/O
+            self._outbox.put((kind, message))
+
+    def _send(self, kind, message):
+        try:
+            self.client.publish(SHARED_STATE_CHANNEL, message)
+        except Exception:
+            logger.exception("Could not publish %s to other workers", kind)
+
+    def _drain(self):
+        while True:
+            item = self._outbox.get()
+            if item is None:
+                return
+            self._send(*item)
+
+    def acquire(self, name, ttl):
+        return bool(self.client.set(f"quiz:lease:{name}", self.worker_id, nx=True, ex=max(1, int(ttl))))
+
+    def start(self):
+        self._stopping.clear()
+        self._publisher = threading.Thread(target=self._drain, name="shared-state-publish", daemon=True)
+        self._publisher.start()
+        self._thread = threading.Thread(target=self._listen, name="shared-state", daemon=True)
+        self._thread.start()
+        # Don't serve requests before other workers' changes can reach us
+        if not self._subscribed.wait(timeout=10):
+            logger.error("Shared state subscription not ready; caches may miss updates from other workers")
+
+    def stop(self):
+        publisher, self._publisher = self._publisher, None
+        if publisher is not None:
+            # Messages queued so far still go out, in order
+            self._outbox.put(None)
+            publisher.join(timeout=5)
+        self._stopping.set()
+        if self._pubsub is not None:
+            self._pubsub.close()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def _listen(self):
+        subscribed_before = False
+        while not self._stopping.is_set():
+            try:
+                self._pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+                self._pubsub.subscribe(SHARED_STATE_CHANNEL)
+                if subscribed_before:
+                    # Messages published while we were disconnected are gone
+                    self._resync()
+                subscribed_before = True
+                self._subscribed.set()
+                while not self._stopping.is_set():
+                    message = self._pubsub.get_message(timeout=1.0)
+                    if message is not None:
+                        self._receive(message["data"])
+            except Exception:
+                if self._stopping.is_set():
+                    return
+                logger.exception("Lost shared state subscription; reconnecting")
+                time.sleep(1)
+
+    def _receive(self, raw):
+        message = json.loads(raw)
+        if message["origin"] != self.worker_id:
+            self._dispatch(message["kind"], message["data"])
+
+def create_state(url=SHARED_STATE_URL):
+    if not url:
+        return MemoryState()
+    if url.startswith("fakeredis://"):
+        # In-process server: runs the Redis code path without a Redis install
+        import fakeredis
+        return RedisState(fakeredis.FakeRedis(server=fakeredis.FakeServer()))
+    import redis
+    return RedisState(redis.Redis.from_url(url))
+
+shared_state = create_state()
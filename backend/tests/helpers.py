@@ -0,0 +1,17 @@
+"""Request helpers shared by the API tests."""
+
+def wrong_answer(correct):
+    return "B" if correct != "B" else "C"
+
+def create_channel(client, name="Test channel", **fields):
+    response = client.post("/channels/?admin_username=admin", json={"name": name, **fields})
+    assert response.status_code == 200, response.text
+    return response.json()
+
+def join(client, channel, username):
+    response = client.post("/join-channel/", json={"code": channel["code"], "username": username})
+    assert response.status_code == 200, response.text
+    return response.json()
+
+def quiz_url(path, channel, username):
+    return f"{path}?username={username}&channel_code={channel['code']}"
@@ -0,0 +1,66 @@
+import pytest
+
+from analytics import compute_analytics, point_biserial
+from helpers import create_channel, join, quiz_url, wrong_answer
+
+def test_compute_analytics_on_a_small_matrix():
+    # Totals: participant 1 scores 2, participant 2 scores 1, participant 3 scores 0
+    answers = [
+        (1, 10, "A", True), (1, 20, "B", True),
+        (2, 10, "A", True), (2, 20, "C", False),
+        (3, 10, "B", False), (3, 20, "C", False),
+    ]
+    scores = [(2, True), (1, False), (0, True)]
+    result = compute_analytics(answers, scores)
+
+    assert result["participants"] == 3
+    assert result["submitted"] == 2
+    assert result["answers"] == 6
+    assert result["mean_score"] == 1.0
+    assert result["median_score"] == 1
+    assert result["score_histogram"] == [1, 1, 1]
+
+    first, second = result["questions"]
+    assert first["question_id"] == 10 and first["responses"] == 3
+    assert first["p_value"] == 0.6667
+    assert first["options"] == {"A": 2, "B": 1, "C": 0, "D": 0}
+    assert second["question_id"] == 20
+    assert second["p_value"] == 0.3333
+    assert second["options"] == {"A": 0, "B": 1, "C": 2, "D": 0}
+    # Both items separate the top scorer from the rest: 1.5 / sqrt(2/3) * sqrt(2) / 3
+    assert first["discrimination"] == second["discrimination"] == 0.866
+
+def test_point_biserial_is_undefined_without_spread():
+    assert point_biserial(3, 3, 6, 14, 6) is None      # everyone correct
+    assert point_biserial(3, 0, 6, 14, 0) is None      # nobody correct
+    assert point_biserial(2, 1, 2, 2, 1) is None       # equal totals
+    assert point_biserial(3, 2, 3, 5, 3) == pytest.approx(0.8660, abs=1e-4)
+
+def test_compute_analytics_without_answers():
+    result = compute_analytics([], [])
+    assert result["participants"] == 0
+    assert result["mean_score"] is None and result["median_score"] is None
+    assert result["score_histogram"] == [0]
+    assert result["questions"] == []
+
+def test_channel_analytics_follow_new_answers(client, answer_key):
+    channel = create_channel(client)
+    join(client, channel, "alice")
+    url = f"/admin/channels/{channel['id']}/analytics"
+    assert client.get(url).json()["answers"] == 0
+    assert client.get("/admin/channels/999999/analytics").status_code == 404
+
+    question_id, correct = next(iter(answer_key.items()))
+    client.post(quiz_url("/submit-answer/", channel, "alice"),
+                json={"question_id": question_id, "selected_answer": correct})
+    result = client.get(url).json()
+    assert result["answers"] == 1 and result["score_histogram"] == [0, 1]
+    assert result["questions"][0]["p_value"] == 1.0
+
+    # Changing the answer shows up too, not the cached result
+    client.post(quiz_url("/submit-answer/", channel, "alice"),
+                json={"question_id": question_id, "selected_answer": wrong_answer(correct)})
+    assert client.get(url).json()["questions"][0]["p_value"] == 0.0
+
+    client.post(quiz_url("/submit-quiz/", channel, "alice"))
+    assert client.get(url).json()["submitted"] == 1
@@ -0,0 +1,78 @@
+import shutil
+
+import pytest
+
+import answer_buffer as answer_buffer_module
+import async_routes
+import main
+from answer_buffer import AnswerBuffer
+from database import SessionLocal, Participant, Answer
+from helpers import create_channel, join, quiz_url, wrong_answer
+
+@pytest.fixture
+def buffer(monkeypatch, tmp_path):
+    """Route submissions through a write-behind buffer that only flushes when asked."""
+    buffer = AnswerBuffer(log_path=str(tmp_path / "answers.log"), flush_ms=60000)
+    buffer.start()
+    for module in (main, async_routes):
+        monkeypatch.setattr(module, "ANSWER_BUFFER", True)
+        monkeypatch.setattr(module, "answer_buffer", buffer)
+    monkeypatch.setattr(answer_buffer_module, "answer_buffer", buffer)
+    yield buffer
+    buffer.stop()
+
+def stored(username):
+    db = SessionLocal()
+    try:
+        participant = db.query(Participant).join(Participant.user).filter_by(username=username).one()
+        answers = dict(db.query(Answer.question_id, Answer.is_correct).filter(Answer.participant_id == participant.id))
+        return participant.score, answers
+    finally:
+        db.close()
+
+def test_buffered_answers_are_scored_at_once_and_written_on_submit(client, buffer, answer_key):
+    channel = create_channel(client)
+    join(client, channel, "alice")
+    first, second = list(answer_key)[:2]
+
+    response = client.post(quiz_url("/submit-answers/", channel, "alice"),
+                           json=[{"question_id": q, "selected_answer": answer_key[q]} for q in (first, second)])
+    assert response.json()["score"] == 2
+    response = client.post(quiz_url("/submit-answer/", channel, "alice"),
+                           json={"question_id": first, "selected_answer": wrong_answer(answer_key[first])})
+    assert response.json() == {"correct": False, "score": 1}
+    assert stored("alice") == (0, {})
+
+    response = client.post(quiz_url("/submit-quiz/", channel, "alice"))
+    assert response.json()["final_score"] == 1
+    assert stored("alice") == (1, {first: False, second: True})
+
+def test_scores_build_on_flushed_answers(client, buffer, answer_key):
+    channel = create_channel(client)
+    join(client, channel, "alice")
+    first, second = list(answer_key)[:2]
+    url = quiz_url("/submit-answer/", channel, "alice")
+
+    client.post(url, json={"question_id": first, "selected_answer": answer_key[first]})
+    buffer.flush()
+    assert stored("alice") == (1, {first: True})
+    assert client.post(url, json={"question_id": second, "selected_answer": answer_key[second]}).json()["score"] == 2
+    assert client.post(url, json={"question_id": first, "selected_answer": answer_key[first]}).json()["score"] == 2
+
+def test_buffered_answers_are_replayed_after_a_crash(client, buffer, answer_key, tmp_path):
+    channel = create_channel(client)
+    join(client, channel, "alice")
+    question_id = next(iter(answer_key))
+    client.post(quiz_url("/submit-answer/", channel, "alice"),
+                json={"question_id": question_id, "selected_answer": answer_key[question_id]})
+
+    # The log as a process that died before flushing would have left it
+    crashed_log = tmp_path / "crashed.log"
+    shutil.copy(buffer.log_path, crashed_log)
+    assert AnswerBuffer(log_path=str(crashed_log)).recover() == 1
+    assert not crashed_log.exists()
+    assert stored("alice") == (1, {question_id: True})
+
+    # Replaying answers that did reach the database changes nothing
+    buffer.flush()
+    assert stored("alice") == (1, {question_id: True})
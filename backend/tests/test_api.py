@@ -0,0 +1,249 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import httpx
+
+from database import SessionLocal, Participant, Answer
+from identity_cache import identity_cache
+from helpers import create_channel, join, quiz_url, wrong_answer
+
+def leaderboard_scores(client, channel):
+    entries = client.get(f"/leaderboard/{channel['code']}").json()["entries"]
+    return {entry["username"]: entry["score"] for entry in entries}
+
+def stored_answers(channel_id):
+    db = SessionLocal()
+    try:
+        return db.query(Answer).join(Participant, Participant.id == Answer.participant_id) \
+            .filter(Participant.channel_id == channel_id).count()
+    finally:
+        db.close()
+
+def test_join_sets_deadline_and_rejoin_keeps_it(client):
+    channel = create_channel(client, duration_minutes=5)
+    first = join(client, channel, "alice")
+    assert 290 <= first["seconds_remaining"] <= 300
+    again = join(client, channel, "alice")
+    assert again["deadline_at"] == first["deadline_at"]
+    assert again["quiz_started_at"] == first["quiz_started_at"]
+
+def test_concurrent_joins_share_one_participant(client):
+    from main import app
+    join(client, create_channel(client, name="Other channel"), "alice")
+
+    async def join_together(channel):
+        # One event loop, so the async routes really interleave under DB_ASYNC=true
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as http:
+            return await asyncio.gather(*(
+                http.post("/join-channel/", json={"code": channel["code"], "username": "alice"}) for _ in range(5)
+            ))
+
+    db = SessionLocal()
+    try:
+        for attempt in range(3):
+            channel = create_channel(client, name=f"Round {attempt}")
+            responses = asyncio.run(join_together(channel))
+            assert [r.status_code for r in responses] == [200] * 5, [r.text for r in responses]
+            assert len({r.json()["deadline_at"] for r in responses}) == 1
+            assert db.query(Participant).filter(Participant.channel_id == channel["id"]).count() == 1
+    finally:
+        db.close()
+
+def test_join_unknown_channel(client):
+    response = client.post("/join-channel/", json={"code": "NOPE00", "username": "alice"})
+    assert response.status_code == 404
+
+def test_submit_answer_applies_score_deltas(client, answer_key):
+    channel = create_channel(client)
+    join(client, channel, "alice")
+    question_id, correct = next(iter(answer_key.items()))
+    url = quiz_url("/submit-answer/", channel, "alice")
+
+    steps = [(correct, 1), (wrong_answer(correct), 0), (wrong_answer(correct), 0), (correct, 1), (correct, 1)]
+    for selected, expected in steps:
+        response = client.post(url, json={"question_id": question_id, "selected_answer": selected})
+        assert response.status_code == 200, response.text
+        assert response.json()["score"] == expected
+    assert leaderboard_scores(client, channel) == {"alice": 1}
+    assert stored_answers(channel["id"]) == 1
+
+def test_submit_answer_rejects_bad_input(client, answer_key):
+    channel = create_channel(client)
+    join(client, channel, "alice")
+    url = quiz_url("/submit-answer/", channel, "alice")
+    question_id = next(iter(answer_key))
+    assert client.post(url, json={"question_id": question_id, "selected_answer": "E"}).status_code == 422
+    assert client.post(url, json={"question_id": 999999, "selected_answer": "A"}).status_code == 404
+    unknown_user = quiz_url("/submit-answer/", channel, "nobody")
+    assert client.post(unknown_user, json={"question_id": question_id, "selected_answer": "A"}).status_code == 404
+
+def test_submit_answers_batch(client, answer_key):
+    channel = create_channel(client)
+    join(client, channel, "bob")
+    url = quiz_url("/submit-answers/", channel, "bob")
+    question_ids = list(answer_key)[:3]
+
+    response = client.post(url, json=[{"question_id": q, "selected_answer": answer_key[q]} for q in question_ids])
+    assert response.json()["score"] == 3
+
+    # Re-answering one question wrongly only moves the score by that question
+    first = question_ids[0]
+    response = client.post(url, json=[{"question_id": first, "selected_answer": wrong_answer(answer_key[first])}])
+    assert response.json() == {"results": [{"question_id": first, "correct": False}], "score": 2}
+
+    # A batch with an unknown question is rejected whole
+    response = client.post(url, json=[{"question_id": first, "selected_answer": answer_key[first]},
+                                      {"question_id": 999999, "selected_answer": "A"}])
+    assert response.status_code == 404
+    assert leaderboard_scores(client, channel) == {"bob": 2}
+    assert client.get("/admin/scores/drift").json() == []
+
+def test_submit_quiz_finalises_score(client, answer_key):
+    channel = create_channel(client)
+    join(client, channel, "carol")
+    question_ids = list(answer_key)[:2]
+    client.post(quiz_url("/submit-answers/", channel, "carol"),
+                json=[{"question_id": q, "selected_answer": answer_key[q]} for q in question_ids])
+
+    response = client.post(quiz_url("/submit-quiz/", channel, "carol"))
+    assert response.status_code == 200
+    assert response.json()["final_score"] == 2
+
+    entries = client.get(f"/leaderboard/{channel['code']}").json()["entries"]
+    assert entries[0]["submitted"] is True
+    # A submitted participant can't join again
+    response = client.post("/join-channel/", json={"code": channel["code"], "username": "carol"})
+    assert response.status_code == 400
+
+def test_leaderboard_bounds(client):
+    channel = create_channel(client)
+    for username in ("alice", "bob", "carol"):
+        join(client, channel, username)
+    board = f"/leaderboard/{channel['code']}"
+    assert len(client.get(f"{board}?limit=2").json()["entries"]) == 2
+    assert len(client.get(f"{board}/around/bob?window=1").json()["entries"]) == 3
+    for url in (f"{board}?limit=0", f"{board}?limit=-1", f"{board}?limit=101",
+                f"{board}/around/bob?window=0", f"{board}/around/bob?window=-2", f"{board}/around/bob?window=51"):
+        assert client.get(url).status_code == 422, url
+
+def test_results(client, answer_key):
+    channel = create_channel(client)
+    other = create_channel(client, name="Other channel")
+    for username in ("alice", "bob"):
+        join(client, channel, username)
+    join(client, other, "carol")
+    question_id = next(iter(answer_key))
+    client.post(quiz_url("/submit-answer/", channel, "alice"),
+                json={"question_id": question_id, "selected_answer": answer_key[question_id]})
+
+    results = client.get("/admin/results").json()
+    assert [r["username"] for r in results] == ["alice", "bob", "carol"]
+    assert results[0]["score"] == 1
+    assert results[0]["answers"] == [{"question_id": question_id, "selected_answer": answer_key[question_id],
+                                      "is_correct": True}]
+    assert results[0]["questions_shown"] > 0
+
+    filtered = client.get(f"/admin/results?channel_id={channel['id']}").json()
+    assert [r["username"] for r in filtered] == ["alice", "bob"]
+    page = client.get(f"/admin/results?after={results[0]['participant_id']}&limit=1").json()
+    assert [r["username"] for r in page] == ["bob"]
+
+    detail = client.get("/admin/results/alice").json()
+    assert detail["score"] == 1 and detail["total_questions"] == 1
+    assert client.get("/admin/results/nobody").status_code == 404
+
+def test_delete_channel_removes_its_results(client, answer_key):
+    channel = create_channel(client)
+    other = create_channel(client, name="Other channel")
+    join(client, channel, "alice")
+    join(client, other, "bob")
+    question_id = next(iter(answer_key))
+    for target, username in ((channel, "alice"), (other, "bob")):
+        client.post(quiz_url("/submit-answer/", target, username),
+                    json={"question_id": question_id, "selected_answer": answer_key[question_id]})
+
+    assert client.delete(f"/admin/channels/{channel['id']}").status_code == 200
+    assert stored_answers(channel["id"]) == 0
+    assert stored_answers(other["id"]) == 1
+    assert [r["username"] for r in client.get("/admin/results").json()] == ["bob"]
+    assert client.get(f"/leaderboard/{channel['code']}").status_code == 404
+    # Cached identities of the deleted channel are gone too
+    response = client.post(quiz_url("/submit-answer/", channel, "alice"),
+                           json={"question_id": question_id, "selected_answer": "A"})
+    assert response.status_code == 404
+
+def test_background_clear_deletes_answers_with_their_participants(client, answer_key):
+    from main import delete_in_batches, delete_participant_batch
+    channel = create_channel(client)
+    question_id = next(iter(answer_key))
+    for username in ("alice", "bob", "carol"):
+        join(client, channel, username)
+        client.post(quiz_url("/submit-answer/", channel, username),
+                    json={"question_id": question_id, "selected_answer": answer_key[question_id]})
+
+    batches, late_answers = [], []
+    def delete_batch(db, batch_size):
+        if batches:
+            # alice went in the first batch while her quiz was still open
+            late_answers.append(client.post(quiz_url("/submit-answer/", channel, "alice"),
+                                            json={"question_id": question_id, "selected_answer": "A"}).status_code)
+        batches.append(batch_size)
+        return delete_participant_batch(db, batch_size)
+
+    assert delete_in_batches(delete_batch, batch_size=2, pause=0) == 3
+    assert late_answers == [404]
+    db = SessionLocal()
+    try:
+        assert db.query(Answer).count() == 0
+    finally:
+        db.close()
+
+    join(client, channel, "dave")
+    assert client.delete("/admin/results?background=true").status_code == 200
+    assert client.get("/admin/results").json() == []
+    assert client.get(f"/leaderboard/{channel['code']}").status_code == 404
+
+def test_changing_the_answer_key_regrades(client, answer_key):
+    channel = create_channel(client)
+    join(client, channel, "alice")
+    question_id, correct = next(iter(answer_key.items()))
+    client.post(quiz_url("/submit-answer/", channel, "alice"),
+                json={"question_id": question_id, "selected_answer": correct})
+
+    question = next(q for q in client.get("/questions/").json() if q["id"] == question_id)
+    question["correct_answer"] = wrong_answer(correct)
+    del question["id"]
+    assert client.put(f"/admin/questions/{question_id}", json=question).status_code == 200
+    assert leaderboard_scores(client, channel) == {"alice": 0}
+    assert client.get("/admin/scores/drift").json() == []
+
+    # New submissions are graded against the fixed key
+    response = client.post(quiz_url("/submit-answer/", channel, "alice"),
+                           json={"question_id": question_id, "selected_answer": wrong_answer(correct)})
+    assert response.json() == {"correct": True, "score": 1}
+
+def test_answers_after_the_deadline_are_rejected(client, answer_key):
+    from main import sweep_deadlines
+    channel = create_channel(client)
+    join(client, channel, "alice")
+    join(client, channel, "bob")
+    db = SessionLocal()
+    try:
+        db.query(Participant).filter(Participant.channel_id == channel["id"]) \
+            .update({"deadline_at": datetime.utcnow() - timedelta(minutes=5)})
+        db.commit()
+    finally:
+        db.close()
+    identity_cache.clear()
+
+    question_id = next(iter(answer_key))
+    response = client.post(quiz_url("/submit-answer/", channel, "alice"),
+                           json={"question_id": question_id, "selected_answer": "A"})
+    assert response.status_code == 403
+    response = client.post(quiz_url("/submit-answers/", channel, "alice"),
+                           json=[{"question_id": question_id, "selected_answer": "A"}])
+    assert response.status_code == 403
+
+    assert sorted(row.username for row in sweep_deadlines()) == ["alice", "bob"]
+    assert sweep_deadlines() == []
+    assert all(entry["submitted"] for entry in client.get(f"/leaderboard/{channel['code']}").json()["entries"])
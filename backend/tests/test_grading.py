@@ -0,0 +1,99 @@
+import asyncio
+from types import SimpleNamespace
+
+from database import SessionLocal, Question
+from grading import AnswerKeyCache, build_key, INVALID_KEY, NO_QUESTION
+from question_bank import question_bank
+from helpers import create_channel, join, quiz_url, wrong_answer
+
+def test_grade_marks_answers_and_reports_missing_questions(answer_key):
+    first, second = list(answer_key)[:2]
+    db = SessionLocal()
+    try:
+        graded, missing = AnswerKeyCache().grade(db, {
+            first: answer_key[first],
+            second: wrong_answer(answer_key[second]),
+            999999: "A",
+        })
+    finally:
+        db.close()
+    assert graded == {first: (answer_key[first], True), second: (wrong_answer(answer_key[second]), False)}
+    assert missing == [999999]
+
+def test_new_questions_are_graded_once_added(client):
+    channel = create_channel(client)
+    join(client, channel, "alice")
+    url = quiz_url("/submit-answer/", channel, "alice")
+    # Load the answer key before the question exists
+    client.post(url, json={"question_id": 999999, "selected_answer": "A"})
+
+    question = client.post("/admin/questions", json={
+        "text": "Which AWS service is a managed message queue?",
+        "option_a": "SNS", "option_b": "SQS", "option_c": "SES", "option_d": "EFS",
+        "correct_answer": "B",
+    }).json()
+    response = client.post(url, json={"question_id": question["id"], "selected_answer": "B"})
+    assert response.json() == {"correct": True, "score": 1}
+
+def test_imported_questions_are_graded(client):
+    channel = create_channel(client)
+    join(client, channel, "alice")
+    url = quiz_url("/submit-answer/", channel, "alice")
+    client.post(url, json={"question_id": 999999, "selected_answer": "A"})
+
+    upload = "text,option_a,option_b,option_c,option_d,correct_answer\r\n" \
+             "Which AWS service stores objects?,EBS,S3,EFS,RDS,B\r\n"
+    report = client.post("/admin/questions/import",
+                         files={"file": ("questions.csv", upload.encode("utf-8-sig"), "text/csv")}).json()
+    assert report["inserted"] == 1 and report["errors"] == 0
+
+    question = next(q for q in client.get("/questions/").json() if q["text"] == "Which AWS service stores objects?")
+    response = client.post(url, json={"question_id": question["id"], "selected_answer": "B"})
+    assert response.json() == {"correct": True, "score": 1}
+
+def test_build_key_only_accepts_single_letter_keys():
+    keys = [None, "", "AB", "a", "E", "C"]
+    key = build_key(1, [SimpleNamespace(id=i, correct_answer=k) for i, k in enumerate(keys, start=1)])
+    assert list(key.codes) == [NO_QUESTION] + [INVALID_KEY] * 5 + [2]
+
+def test_questions_without_a_valid_key_mark_nothing_correct(client):
+    db = SessionLocal()
+    try:
+        questions = [Question(text=f"Broken key {key!r}", option_a="1", option_b="2", option_c="3", option_d="4",
+                              correct_answer=key) for key in (None, "", "AB")]
+        db.add_all(questions)
+        db.commit()
+        question_ids = [q.id for q in questions]
+    finally:
+        db.close()
+    question_bank.invalidate()
+
+    channel = create_channel(client)
+    join(client, channel, "alice")
+    response = client.post(quiz_url("/submit-answers/", channel, "alice"),
+                           json=[{"question_id": q, "selected_answer": "A"} for q in question_ids])
+    assert response.json()["score"] == 0
+    assert not any(result["correct"] for result in response.json()["results"])
+    # The SQL re-grade agrees with the in-memory key
+    response = client.post(f"/admin/channels/{channel['id']}/regrade")
+    assert response.json()["answers_changed"] == 0
+
+def test_async_routes_use_the_threadpool_only_on_a_cache_miss(answer_key, monkeypatch):
+    import async_routes
+    loads = []
+    async def run_in_threadpool(func, *args):
+        loads.append(func)
+        return func(*args)
+    monkeypatch.setattr(async_routes, "run_in_threadpool", run_in_threadpool)
+    question_id, correct = next(iter(answer_key.items()))
+
+    for _ in range(2):
+        graded, missing = asyncio.run(async_routes.grade({question_id: correct}))
+        assert graded == {question_id: (correct, True)} and missing == []
+        assert len(asyncio.run(async_routes.draw_ids("seed"))) > 0
+    assert len(loads) == 1
+
+    question_bank.invalidate()
+    asyncio.run(async_routes.draw_ids("seed"))
+    asyncio.run(async_routes.grade({question_id: correct}))
+    assert len(loads) == 3
@@ -0,0 +1,59 @@
+import pytest
+
+from question_packs import choose_encoding, etag_matches
+
+@pytest.mark.parametrize("accept_encoding, has_br, expected", [
+    ("", True, "identity"),
+    ("identity", True, "identity"),
+    ("gzip, deflate, br", True, "br"),
+    ("gzip, deflate, br", False, "gzip"),
+    ("GZIP", False, "gzip"),
+    ("gzip;q=1.0, br;q=0.5", True, "gzip"),
+    ("gzip, br;q=0", True, "gzip"),
+    ("br;q=0", True, "identity"),
+    ("*", True, "br"),
+    ("*;q=0", True, "identity"),
+    ("gzip, *;q=0", True, "gzip"),
+    ("gzip;q=0, *", True, "br"),
+    ("gzip;q=0, *", False, "identity"),
+    ("gzip;q=oops", False, "identity"),
+])
+def test_choose_encoding(accept_encoding, has_br, expected):
+    assert choose_encoding(accept_encoding, has_br) == expected
+
+@pytest.mark.parametrize("if_none_match, expected", [
+    (None, False),
+    ("", False),
+    ('"abc"', True),
+    ('W/"abc"', True),
+    ('"other", W/"abc-gz"', True),
+    ('"abc-br"', False),
+    ('"ab"', False),
+    ("*", True),
+])
+def test_etag_matches(if_none_match, expected):
+    assert etag_matches(if_none_match, ['"abc"', '"abc-gz"']) is expected
+
+def test_questions_are_revalidated_across_encodings(client):
+    plain = client.get("/questions/", headers={"Accept-Encoding": "identity"})
+    assert plain.status_code == 200 and "Content-Encoding" not in plain.headers
+    zipped = client.get("/questions/", headers={"Accept-Encoding": "gzip"})
+    assert zipped.headers["Content-Encoding"] == "gzip"
+    assert zipped.json() == plain.json()
+    assert zipped.headers["ETag"] != plain.headers["ETag"]
+    assert zipped.headers["Vary"] == "Accept-Encoding"
+
+    # The tag of another encoding, or a weak one, still means the client is current
+    for tag in (plain.headers["ETag"], zipped.headers["ETag"], "W/" + plain.headers["ETag"]):
+        response = client.get("/questions/", headers={"Accept-Encoding": "gzip", "If-None-Match": tag})
+        assert response.status_code == 304
+        assert response.content == b""
+        assert response.headers["ETag"] == zipped.headers["ETag"]
+
+    # Any change to the bank changes the tags
+    question = plain.json()[0]
+    del question["id"]
+    client.post("/admin/questions", json={**question, "text": question["text"] + " (copy)"})
+    response = client.get("/questions/", headers={"Accept-Encoding": "identity", "If-None-Match": plain.headers["ETag"]})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != plain.headers["ETag"]
@@ -0,0 +1,130 @@
+import threading
+import time
+
+import fakeredis
+import pytest
+
+import identity_cache as identity_cache_module
+import leaderboard as leaderboard_module
+import question_bank as question_bank_module
+from database import SessionLocal, Participant
+from identity_cache import IdentityCache
+from leaderboard import Leaderboards
+from question_bank import QuestionBank
+from shared_state import RedisState
+from helpers import create_channel, join
+
+class Worker:
+    """One app worker's caches, wired to its own RedisState the way the modules wire theirs."""
+
+    def __init__(self, server):
+        self.state = RedisState(fakeredis.FakeRedis(server=server))
+        self.bank = QuestionBank()
+        self.identities = IdentityCache()
+        self.boards = Leaderboards()
+        self.resyncs = 0
+        self.state.on("questions.invalidate", self.bank._invalidate_local)
+        self.state.on("identity.invalidate_channel", self.identities._invalidate_channel)
+        self.state.on("identity.invalidate_user", self.identities._invalidate_user)
+        self.state.on("identity.clear", self.identities._clear)
+        self.state.on("leaderboard.update", self.boards._update)
+        self.state.on("leaderboard.drop", self.boards._drop)
+        self.state.on_resync(self.resynced)
+
+    def resynced(self):
+        self.resyncs += 1
+
+def wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.02)
+
+@pytest.fixture
+def workers(monkeypatch):
+    """Two workers on one Redis server; the module-level caches broadcast as the first."""
+    server = fakeredis.FakeServer()
+    first, second = Worker(server), Worker(server)
+    for module in (question_bank_module, identity_cache_module, leaderboard_module):
+        monkeypatch.setattr(module, "shared_state", first.state)
+    first.state.start()
+    second.state.start()
+    yield server, first, second
+    first.state.stop()
+    second.state.stop()
+
+def test_question_bank_invalidation_reaches_other_workers(workers):
+    server, first, second = workers
+    first.bank.invalidate()
+    assert first.bank.version == 1
+    wait_for(lambda: second.bank.version == 1)
+
+def test_identity_invalidation_reaches_other_workers(workers):
+    server, first, second = workers
+    for worker in (first, second):
+        worker.identities.put("alice", "ABC123", 1, 10)
+        worker.identities.put("bob", "ABC123", 2, 10)
+        worker.identities.put("alice", "XYZ789", 3, 20)
+
+    first.identities.invalidate_user("bob")
+    wait_for(lambda: second.identities.get("bob", "ABC123") is None)
+    first.identities.invalidate_channel(20)
+    wait_for(lambda: second.identities.get("alice", "XYZ789") is None)
+    assert second.identities.get("alice", "ABC123") == (1, 10, None)
+    first.identities.clear()
+    wait_for(lambda: second.identities.get("alice", "ABC123") is None)
+
+def test_leaderboard_updates_reach_other_workers(client, workers):
+    server, first, second = workers
+    channel = create_channel(client)
+    join(client, channel, "alice")
+    db = SessionLocal()
+    try:
+        participant_id = db.query(Participant.id).filter(Participant.channel_id == channel["id"]).scalar()
+        # Only boards a worker has loaded are kept up to date
+        for worker in (first, second):
+            assert worker.boards.top(db, channel["id"], 10)[1][0]["score"] == 0
+        first.boards.update(channel["id"], participant_id, "alice", 5)
+        wait_for(lambda: second.boards.top(db, channel["id"], 10)[1][0]["score"] == 5)
+        assert first.boards.top(db, channel["id"], 10)[1][0]["score"] == 5
+    finally:
+        db.close()
+
+def test_leases_are_held_by_one_worker(workers):
+    server, first, second = workers
+    assert first.state.acquire("deadline-sweep", 5)
+    assert not second.state.acquire("deadline-sweep", 5)
+    assert not first.state.acquire("deadline-sweep", 5)
+    assert second.state.acquire("score-check", 5)
+
+def test_workers_resync_after_reconnecting(workers):
+    server, first, second = workers
+    server.connected = False
+    time.sleep(1.5)
+    server.connected = True
+    wait_for(lambda: second.resyncs == 1)
+
+    # Broadcasts flow again once resubscribed
+    first.bank.invalidate()
+    wait_for(lambda: second.bank.version == 1)
+
+def test_messages_from_a_worker_are_not_applied_twice(workers):
+    server, first, second = workers
+    first.state.broadcast("questions.invalidate")
+    wait_for(lambda: second.bank.version == 1)
+    time.sleep(0.2)
+    assert first.bank.version == 1
+
+def test_broadcasts_are_published_off_the_calling_thread(workers, monkeypatch):
+    server, first, second = workers
+    publishers = []
+    publish = first.state.client.publish
+    def recording_publish(*args):
+        publishers.append(threading.current_thread())
+        return publish(*args)
+    monkeypatch.setattr(first.state.client, "publish", recording_publish)
+
+    # Route handlers call this on the event loop, which must not wait on Redis
+    first.bank.invalidate()
+    wait_for(lambda: second.bank.version == 1)
+    assert publishers and threading.current_thread() not in publishers
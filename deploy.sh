@@ -7,8 +7,9 @@ echo "Setting up AWS Quiz Platform..."
 # Update system
 sudo apt update && sudo apt upgrade -y
 
-# Install Python and Node.js
-sudo apt install -y python3 python3-pip python3-venv nodejs npm
+# Install Python, Node.js and Redis (shared state for the backend workers)
+sudo apt install -y python3 python3-pip python3-venv nodejs npm redis-server
+sudo systemctl enable --now redis-server
 
 # Setup backend
 cd backend
@@ -16,8 +17,9 @@ python3 -m venv venv
 source venv/bin/activate
 pip install -r requirements.txt
 
-# Initialize database and seed questions
+# Initialize database, upgrade an existing one and seed questions
 python -c "from database import Base, engine; Base.metadata.create_all(bind=engine)"
+python migrate.py
 python seed_questions.py
 
 # Setup frontend
@@ -31,14 +33,17 @@ npm run build
 sudo tee /etc/systemd/system/quiz-backend.service > /dev/null <<EOF
 [Unit]
 Description=Quiz Backend API
-After=network.target
+After=network.target redis-server.service
 
 [Service]
 Type=simple
 User=ubuntu
 WorkingDirectory=/home/ubuntu/Quize-aws/backend
 Environment=PATH=/home/ubuntu/Quize-aws/backend/venv/bin
-ExecStart=/home/ubuntu/Quize-aws/backend/venv/bin/uvicorn main:app --host 0.0.0.0 --port 8000
+# Workers share caches, leaderboards and live feeds through Redis
+Environment=SHARED_STATE_URL=redis://localhost:6379/0
+ExecStart=/home/ubuntu/Quize-aws/backend/venv/bin/gunicorn main:app -k uvicorn.workers.UvicornWorker --workers $(nproc) --bind 0.0.0.0:8000 --graceful-timeout 30
+ExecReload=/bin/kill -HUP \$MAINPID
 Restart=always
 
 [Install]
@@ -73,6 +78,8 @@ sudo systemctl start quiz-backend quiz-frontend
 sudo apt install -y nginx
 
 sudo tee /etc/nginx/sites-available/quiz-platform > /dev/null <<EOF
+proxy_cache_path /var/cache/nginx/quiz levels=1:2 keys_zone=quiz_api:10m max_size=100m inactive=10m;
+
 server {
     listen 80;
     server_name _;
@@ -90,10 +97,24 @@ server {
         proxy_read_timeout 86400;
     }
 
+    # Question bank pack: cached here for X-Accel-Expires seconds, revalidated with its ETag
+    location = /api/questions/ {
+        proxy_pass http://localhost:8000/questions/;
+        proxy_cache quiz_api;
+        proxy_cache_revalidate on;
+        proxy_cache_lock on;
+        proxy_set_header Host \$host;
+        add_header X-Cache-Status \$upstream_cache_status;
+    }
+
     location /api/ {
         proxy_pass http://localhost:8000/;
+        proxy_http_version 1.1;
+        proxy_set_header Connection '';
         proxy_set_header Host \$host;
         proxy_set_header X-Real-IP \$remote_addr;
+        # Live channel feeds are long-lived Server-Sent Events streams
+        proxy_read_timeout 3600;
     }
 }
 EOF
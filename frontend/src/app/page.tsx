@@ -1,5 +1,5 @@
 'use client'
-import { useState, useEffect, useCallback } from 'react'
+import { useState, useEffect, useCallback, useRef } from 'react'
 import axios from 'axios'
 import jsPDF from 'jspdf'
 import toast, { Toaster } from 'react-hot-toast'
@@ -27,6 +27,9 @@ export default function Home() {
   const [timeLeft, setTimeLeft] = useState(QUIZ_TIME)
   const [quizStarted, setQuizStarted] = useState(false)
   const [quizStartTime, setQuizStartTime] = useState<string | null>(null)
+  const [deadline, setDeadline] = useState<number | null>(null)
+  // question_id -> answer the server has stored, so the final batch only sends the rest
+  const savedAnswers = useRef(new Map<number, string>())
   const [isSubmitting, setIsSubmitting] = useState(false)
   const [showSubmitDialog, setShowSubmitDialog] = useState(false)
   const [confirmText, setConfirmText] = useState('')
@@ -71,7 +74,7 @@ export default function Home() {
     return `${minutes}:${seconds.toString().padStart(2, '0')}`
   }
 
-  const submitAllAnswers = useCallback(async () => {
+  const submitAllAnswers = useCallback(async (timedOut = false) => {
     if (isSubmitting) return
     setIsSubmitting(true)
     
@@ -81,26 +84,48 @@ export default function Home() {
       setQuestionStates(newStates)
     }
     
+    const answers = []
     for (let i = 0; i < questions.length; i++) {
       const state = questionStates[i] || (i === currentQuestion && selectedAnswer ? { selectedAnswer } : null)
-      if (state?.selectedAnswer) {
-        try {
-          await axios.post(`${API_BASE}/submit-answer/?username=${username}&channel_code=${channelCode}`, {
-            question_id: questions[i].id,
-            selected_answer: state.selectedAnswer
-          })
-        } catch (error) {
-          console.error('Error submitting answer:', error)
+      if (state?.selectedAnswer && savedAnswers.current.get(questions[i].id) !== state.selectedAnswer) {
+        answers.push({ question_id: questions[i].id, selected_answer: state.selectedAnswer })
+      }
+    }
+    if (answers.length > 0) {
+      try {
+        await axios.post(`${API_BASE}/submit-answers/?username=${username}&channel_code=${channelCode}`, answers)
+      } catch (error: any) {
+        if (error.response?.status === 403) {
+          // Past the deadline: only answers saved while answering count
+          leaveQuiz()
+          toast.error('Time is up. Answers not saved before the deadline were not accepted.')
+          return
         }
+        console.error('Error submitting answers:', error)
+        setIsSubmitting(false)
+        toast.error('Failed to submit your answers. Please try again.', { id: 'submit-error' })
+        return
       }
     }
-    // Mark quiz as submitted
-    try {
-      await axios.post(`${API_BASE}/submit-quiz/?username=${username}&channel_code=${channelCode}`)
-    } catch (error) {
-      console.error('Error marking quiz as submitted:', error)
+    // Mark quiz as submitted; at the deadline the server's sweep does this
+    if (!timedOut) {
+      try {
+        await axios.post(`${API_BASE}/submit-quiz/?username=${username}&channel_code=${channelCode}`)
+      } catch (error) {
+        console.error('Error marking quiz as submitted:', error)
+        setIsSubmitting(false)
+        toast.error('Failed to submit the quiz. Please try again.', { id: 'submit-error' })
+        return
+      }
     }
     
+    leaveQuiz()
+    toast.success(timedOut
+      ? 'Time is up! Your answers have been submitted.'
+      : 'Quiz submitted successfully! You cannot retake this quiz.')
+  }, [questionStates, selectedAnswer, currentQuestion, questions, username, channelCode, isSubmitting])
+
+  const leaveQuiz = () => {
     // Reset all states
     setQuizStarted(false)
     setQuizStartTime(null)
@@ -109,35 +134,40 @@ export default function Home() {
     setQuestionStates([])
     setCurrentQuestion(0)
     setSelectedAnswer('')
+    setDeadline(null)
     setTimeLeft(QUIZ_TIME)
+    savedAnswers.current = new Map()
     
     setMode('home')
-    toast.success('Quiz submitted successfully! You cannot retake this quiz.')
-  }, [questionStates, selectedAnswer, currentQuestion, questions, username, channelCode, isSubmitting])
+  }
 
   useEffect(() => {
     let timer: NodeJS.Timeout
-    if (quizStarted && !isSubmitting) {
+    // The clock runs from joining, whether or not the quiz has been started
+    if (mode === 'quiz' && deadline !== null && !isSubmitting) {
       timer = setInterval(() => {
-        setTimeLeft(prev => {
-          const remaining = Math.max(0, prev - 1000)
-          if (remaining <= 0) {
-            clearInterval(timer)
-            submitAllAnswers()
-          }
-          return remaining
-        })
+        // Read the wall clock: intervals drift and are throttled in background tabs
+        const remaining = Math.max(0, deadline - Date.now())
+        setTimeLeft(remaining)
+        if (remaining <= 0) {
+          clearInterval(timer)
+          submitAllAnswers(true)
+        }
       }, 1000)
     }
     return () => {
       if (timer) clearInterval(timer)
     }
-  }, [quizStarted, isSubmitting, submitAllAnswers])
+  }, [mode, deadline, isSubmitting, submitAllAnswers])
 
   const joinChannel = async () => {
     try {
       const response = await axios.post(`${API_BASE}/join-channel/`, { code: channelCode, username })
       setCurrentChannel(response.data.channel)
+      // The server owns the deadline; re-joining resumes the remaining time.
+      // Counting down seconds_remaining on this clock avoids any client clock skew.
+      setDeadline(Date.now() + response.data.seconds_remaining * 1000)
+      setTimeLeft(response.data.seconds_remaining * 1000)
       loadQuestions()
       setMode('quiz')
     } catch (error: any) {
@@ -179,15 +209,13 @@ export default function Home() {
   }
 
   const startQuiz = () => {
-    const expiryTime = Date.now() + QUIZ_TIME
-    setTimeLeft(QUIZ_TIME)
     setQuizStartTime(new Date().toISOString())
     setQuizStarted(true)
   }
 
   const loadQuestions = async () => {
     try {
-      const response = await axios.get(`${API_BASE}/questions/random/70`)
+      const response = await axios.get(`${API_BASE}/quiz-questions/?username=${username}&channel_code=${channelCode}`)
       setQuestions(response.data)
       setQuestionStates(response.data.map(() => ({ answered: false, marked: false, selectedAnswer: '' })))
     } catch (error) {
@@ -206,7 +234,28 @@ export default function Home() {
     setQuestionStates(newStates)
   }
 
+  const saveAnswer = async (questionId: number, answer: string) => {
+    // Saved as the student goes, so a late final submission can't lose every answer
+    try {
+      await axios.post(`${API_BASE}/submit-answer/?username=${username}&channel_code=${channelCode}`, { question_id: questionId, selected_answer: answer })
+      savedAnswers.current.set(questionId, answer)
+    } catch (error: any) {
+      if (error.response?.status === 403) {
+        toast.error('Time is up for this quiz.', { id: 'time-up' })
+      } else {
+        console.error('Error saving answer:', error)
+      }
+    }
+  }
+
+  const saveCurrentAnswer = () => {
+    if (selectedAnswer && selectedAnswer !== questionStates[currentQuestion]?.selectedAnswer) {
+      saveAnswer(questions[currentQuestion].id, selectedAnswer)
+    }
+  }
+
   const saveAndNext = () => {
+    saveCurrentAnswer()
     if (selectedAnswer) {
       const newStates = [...questionStates]
       newStates[currentQuestion] = { answered: true, marked: newStates[currentQuestion].marked, selectedAnswer }
@@ -219,6 +268,7 @@ export default function Home() {
   }
 
   const saveAndPrevious = () => {
+    saveCurrentAnswer()
     if (selectedAnswer) {
       const newStates = [...questionStates]
       newStates[currentQuestion] = { answered: true, marked: newStates[currentQuestion].marked, selectedAnswer }
@@ -1303,8 +1353,8 @@ export default function Home() {
                     <div style={{fontSize: '14px', color: '#718096'}}>Questions</div>
                   </div>
                   <div style={{textAlign: 'center'}}>
-                    <div style={{fontSize: '24px', fontWeight: '700', color: '#2d3748'}}>70</div>
-                    <div style={{fontSize: '14px', color: '#718096'}}>Minutes</div>
+                    <div style={{fontSize: '24px', fontWeight: '700', color: '#2d3748'}}>{Math.ceil(timeLeft / 60000)}</div>
+                    <div style={{fontSize: '14px', color: '#718096'}}>Minutes Left</div>
                   </div>
                   <div style={{textAlign: 'center'}}>
                     <div style={{fontSize: '24px', fontWeight: '700', color: '#2d3748'}}>4</div>
@@ -0,0 +1,26 @@
+#!/bin/bash
+
+# Run the backend API tests on SQLite, on SQLite with the async routes
+# (DB_ASYNC=true), and on PostgreSQL.
+# The PostgreSQL run uses TEST_POSTGRES_URL, or a local quiz_test database when
+# a server is listening. Its tables are emptied by every test.
+
+set -e
+cd backend
+
+echo "== SQLite =="
+DATABASE_URL="sqlite:///$(mktemp -d)/quiz.db" python -m pytest -q tests
+
+echo "== SQLite, DB_ASYNC=true =="
+DB_ASYNC=true DATABASE_URL="sqlite:///$(mktemp -d)/quiz.db" python -m pytest -q tests
+
+if [ -z "$TEST_POSTGRES_URL" ] && command -v pg_isready > /dev/null && pg_isready -q; then
+    TEST_POSTGRES_URL="postgresql:///quiz_test"
+fi
+
+if [ -n "$TEST_POSTGRES_URL" ]; then
+    echo "== PostgreSQL =="
+    DATABASE_URL="$TEST_POSTGRES_URL" python -m pytest -q tests
+else
+    echo "== PostgreSQL skipped: set TEST_POSTGRES_URL or start a local server with a quiz_test database =="
+fi